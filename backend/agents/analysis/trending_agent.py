@@ -1,13 +1,20 @@
 """
 Trending Analysis Agent - Provides comprehensive insights about why topics are trending
 """
-import json
-from typing import Dict, List, Any, Optional
+import asyncio
+import logging
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 
+import orjson
+
 from ..sql.sql_agent import sql_agent
 from ..integrations.openai_client import openai_client
 from ..integrations.web_search import web_search_client
+from ..integrations.clickhouse_client import client as clickhouse_client
+from ..core.cache import TTLCache
+from ..core.coalesce import coalesce
+from ..core.json_utils import parse_json_response
 from ..prompts.analysis_prompts import (
     get_trending_analysis_prompt,
     get_popularity_distribution_prompt,
@@ -15,21 +22,90 @@ from ..prompts.analysis_prompts import (
     get_trend_comparison_prompt
 )
 
+logger = logging.getLogger(__name__)
+
+# Lookback window, in hours, for each supported time range
+TIME_RANGE_HOURS = {
+    '1h': 1,
+    '6h': 6,
+    '24h': 24,
+    '7d': 7 * 24,
+    '30d': 30 * 24
+}
+
+# Number of regions reported in top_regions / geographic_breakdown
+TOP_REGIONS = 5
+
+# Trending data is shared between the full analysis and summary endpoints for a short window
+TRENDING_DATA_CACHE_TTL = 60
+TRENDING_DATA_CACHE_SIZE = 1024
+
+# Complete analyses are reused for repeat requests (e.g. several campaigns for one topic)
+ANALYSIS_CACHE_TTL = 300
+ANALYSIS_CACHE_SIZE = 1024
+
+# Longer windows change slowly, so their analyses and summaries stay fresh for longer
+ANALYSIS_CACHE_TTLS = {
+    '1h': 60,
+    '6h': ANALYSIS_CACHE_TTL,
+    '24h': 600,
+    '7d': 60 * 60,
+    '30d': 6 * 60 * 60
+}
+
+# Top-level keys of each LLM response shape; valid JSON without any of them is treated as unparsed
+TRENDING_ANALYSIS_KEYS = frozenset({'trending_reason', 'content_analysis', 'trend_patterns', 'business_context', 'prediction'})
+POPULARITY_ANALYSIS_KEYS = frozenset({'category_analysis', 'business_analysis', 'geographic_analysis', 'engagement_analysis'})
+CONTENT_SUMMARY_KEYS = frozenset({'topic_overview', 'content_themes', 'stakeholders', 'timeline', 'significance'})
+
+# Sections of a complete analysis that carry their own "error" key when their step fails
+ANALYSIS_SECTIONS = ('trending_analysis', 'popularity_distribution', 'content_summary', 'web_context')
+
+
+def _is_complete_web_context(web_context: Dict[str, Any]) -> bool:
+    """True if the web context came from a real search with a generated summary"""
+    return "error" not in web_context and not web_context.get("degraded")
+
+
+def _is_cacheable_analysis(analysis: Dict[str, Any]) -> bool:
+    """True if neither the analysis nor any of its sections reports an error, and the web context is complete"""
+    if "error" in analysis:
+        return False
+    if any(isinstance(analysis.get(section), dict) and "error" in analysis[section] for section in ANALYSIS_SECTIONS):
+        return False
+    return _is_complete_web_context(analysis.get("web_context") or {})
+
+# Trend aggregates are read-mostly; let ClickHouse serve repeats from its query cache.
+# The window uses now(), so results are explicitly allowed to be cached for the TTL
+TRENDING_QUERY_SETTINGS = {
+    'use_query_cache': 1,
+    'query_cache_ttl': 300,
+    'query_cache_nondeterministic_function_handling': 'save'
+}
+
 
 class TrendingAnalysisAgent:
     """
     Main trending analysis agent that provides comprehensive insights about trending topics
     """
     
-    def __init__(self):
+    def __init__(self, clickhouse=None):
         self.sql_agent = sql_agent
+        self.clickhouse = clickhouse or clickhouse_client
         self.openai_client = openai_client
         self.web_search = web_search_client
+        self.trending_data_cache = TTLCache(maxsize=TRENDING_DATA_CACHE_SIZE, ttl=TRENDING_DATA_CACHE_TTL)
+        self.analysis_cache = TTLCache(maxsize=ANALYSIS_CACHE_SIZE, ttl=ANALYSIS_CACHE_TTL)
+        self.insights_cache = TTLCache(maxsize=ANALYSIS_CACHE_SIZE, ttl=ANALYSIS_CACHE_TTL)
     
+    @coalesce(key=lambda self, topic_id, time_range="24h": (self, topic_id, time_range))
     async def analyze_topic_trending(self, topic_id: int, time_range: str = "24h") -> Dict[str, Any]:
         """
         Comprehensive analysis of why a topic is trending
         
+        Analyses where every step succeeded are reused for ANALYSIS_CACHE_TTLS[time_range]
+        seconds, and concurrent requests for the same topic share one in-flight analysis.
+        
         Args:
             topic_id: ID of the topic to analyze
             time_range: Time range for analysis
@@ -37,39 +113,50 @@ class TrendingAnalysisAgent:
         Returns:
             Complete trending analysis with content context
         """
+        cache_key = (topic_id, time_range)
+        analysis = self.analysis_cache.get(cache_key)
+        if analysis is None:
+            analysis = await self._analyze_topic_trending(topic_id, time_range)
+            if _is_cacheable_analysis(analysis):
+                self.analysis_cache.set(cache_key, analysis, ttl=ANALYSIS_CACHE_TTLS.get(time_range))
+        return analysis
+    
+    async def _analyze_topic_trending(self, topic_id: int, time_range: str) -> Dict[str, Any]:
+        """Run the full analysis pipeline for one topic (uncached)"""
         try:
-            print(f"Starting comprehensive trending analysis for topic ID: {topic_id}")
+            logger.info("Starting comprehensive trending analysis for topic ID: %s", topic_id)
             
             # Step 1: Get trending data from database
-            print("Fetching trending data from database...")
-            trending_data = await self._get_trending_data(topic_id, time_range)
+            logger.debug("Fetching trending data from database...")
+            trending_data = await self._get_trending_data_cached(topic_id, time_range)
             
             if not trending_data:
                 return {"error": f"No trending data found for topic ID {topic_id}"}
             
             # Step 2: Get web content context
-            print(f"Searching web content for: {trending_data['topic_name']}")
+            logger.debug("Searching web content for: %s", trending_data['topic_name'])
             web_context = await self.web_search.search_topic_context(
                 trending_data['topic_name'],
                 trending_data['category'],
                 time_range
             )
             
-            # Step 3: Generate comprehensive analysis using LLM
-            print("Generating trending analysis with LLM...")
-            trending_analysis = await self._generate_trending_analysis(trending_data, web_context)
-            
-            # Step 4: Analyze popularity distribution
-            print("Analyzing popularity distribution...")
-            popularity_analysis = await self._analyze_popularity_distribution(trending_data)
-            
-            # Step 5: Generate content summary
-            print("Creating content summary...")
-            content_summary = await self._generate_content_summary(
-                trending_data['topic_name'],
-                web_context.get('content_summary', ''),
-                trending_data['category']
+            # Steps 3-5 only depend on the data gathered above, so run them concurrently
+            logger.debug("Generating trending analysis, popularity distribution and content summary...")
+            results = await asyncio.gather(
+                self._generate_trending_analysis(trending_data, web_context),
+                self._analyze_popularity_distribution(trending_data),
+                self._generate_content_summary(
+                    trending_data['topic_name'],
+                    web_context.get('content_summary', ''),
+                    trending_data['category']
+                ),
+                return_exceptions=True
             )
+            trending_analysis, popularity_analysis, content_summary = [
+                {"error": f"{type(result).__name__}: {str(result)}"} if isinstance(result, Exception) else result
+                for result in results
+            ]
             
             # Combine all analyses
             complete_analysis = {
@@ -87,49 +174,104 @@ class TrendingAnalysisAgent:
                 "raw_data": trending_data
             }
             
-            print("Trending analysis completed successfully")
+            logger.info("Trending analysis completed for topic ID: %s", topic_id)
             return complete_analysis
             
         except Exception as e:
-            print(f"ERROR in analyze_topic_trending: {str(e)}")
+            logger.error("Error in analyze_topic_trending: %s", e)
             return {
                 "error": f"Analysis failed: {str(e)}",
                 "topic_id": topic_id,
                 "timestamp": datetime.now().isoformat()
             }
     
+    @coalesce
+    async def _get_trending_data_cached(self, topic_id: int, time_range: str) -> Dict[str, Any]:
+        """
+        Get trending data, reusing a recent result for the same topic and time range
+        """
+        cache_key = (topic_id, time_range)
+        trending_data = self.trending_data_cache.get(cache_key)
+        if trending_data is None:
+            trending_data = await self._get_trending_data(topic_id, time_range)
+            if trending_data:
+                self.trending_data_cache.set(cache_key, trending_data)
+        return trending_data
+    
     async def _get_trending_data(self, topic_id: int, time_range: str) -> Dict[str, Any]:
         """
         Get comprehensive trending data from the database
         """
+        if not self.clickhouse:
+            logger.error("ClickHouse client not available")
+            return None
+        
         try:
-            # Get the topic name first with a simple query
-            from main import client  # Import ClickHouse client
-            topic_query = f"SELECT topic_name, category, business FROM trend_events WHERE topic_id = {topic_id} LIMIT 1"
-            topic_result = client.query(topic_query)
+            # Topic lookup and window aggregates in one round-trip; the stats CTE always
+            # yields a single row, so a row comes back whenever the topic exists
+            trending_query = """
+                WITH
+                    topic AS (
+                        SELECT topic_name, category, business
+                        FROM trend_events
+                        WHERE topic_id = {topic_id:UInt32}
+                        LIMIT 1
+                    ),
+                    stats AS (
+                        SELECT
+                            ifNotFinite(avg(trend_score), 0) AS avg_trend_score,
+                            max(trend_score) AS peak_trend_score,
+                            sum(stat_value) AS total_volume,
+                            count() AS event_count,
+                            groupUniqArray(country_code) AS countries,
+                            sumMap([stat_type], [toUInt64(1)]) AS stat_type_counts,
+                            sumMap([concat(country_code, '-', region_code)], [toUInt64(1)]) AS region_counts
+                        FROM trend_events
+                        WHERE topic_id = {topic_id:UInt32}
+                          AND timestamp >= now() - INTERVAL {hours:UInt32} HOUR
+                    )
+                SELECT
+                    topic.topic_name, topic.category, topic.business,
+                    stats.avg_trend_score, stats.peak_trend_score, stats.total_volume, stats.event_count,
+                    stats.countries, stats.stat_type_counts, stats.region_counts
+                FROM topic CROSS JOIN stats
+            """
+            # clickhouse-connect is synchronous; keep the round-trip off the event loop
+            result = await asyncio.to_thread(
+                self.clickhouse.query,
+                trending_query,
+                parameters={"topic_id": topic_id, "hours": TIME_RANGE_HOURS.get(time_range, 24)},
+                settings=TRENDING_QUERY_SETTINGS
+            )
             
-            if not topic_result or not topic_result.result_rows:
+            if not result or not result.result_rows:
                 return None
-                
-            topic_name, category, business = topic_result.result_rows[0]
             
-            # Return the data with real topic name
+            (topic_name, category, business, avg_trend_score, peak_trend_score, total_volume,
+             event_count, countries, stat_type_counts, region_counts) = result.result_rows[0]
+            
+            # sumMap returns (keys, counts); order regions by event count so the top five are exact
+            stat_counts = dict(zip(*stat_type_counts))
+            region_counts = dict(sorted(zip(*region_counts), key=lambda item: item[1], reverse=True)[:TOP_REGIONS])
+            
             return {
                 "topic_name": topic_name,
                 "category": category, 
                 "business": business,
-                "avg_trend_score": 87.4,
-                "peak_trend_score": 97.2,
-                "total_volume": 649700,
-                "event_count": 15,
-                "countries": ["US", "CA"],
-                "stat_types": ["search_volume", "mentions"],
-                "top_regions": ["US-PA", "US-TX"],
+                "avg_trend_score": round(float(avg_trend_score), 1),
+                "peak_trend_score": round(float(peak_trend_score), 1),
+                "total_volume": int(total_volume),
+                "event_count": int(event_count),
+                "countries": list(countries),
+                "stat_types": list(stat_counts),
+                "stat_type_counts": stat_counts,
+                "top_regions": list(region_counts),
+                "region_counts": region_counts,
                 "time_range": time_range
             }
             
         except Exception as e:
-            print(f"ERROR getting trending data: {str(e)}")
+            logger.error("Error getting trending data: %s", e)
             return None
     
     async def _generate_trending_analysis(self, trending_data: Dict[str, Any], web_context: Dict[str, Any]) -> Dict[str, Any]:
@@ -141,13 +283,13 @@ class TrendingAnalysisAgent:
         
         try:
             system_message, user_message = get_trending_analysis_prompt(trending_data, web_context)
-            analysis_response = await self.openai_client.generate_completion_with_system(system_message, user_message)
+            analysis_response = await self.openai_client.generate_completion_with_system(system_message, user_message, json_mode=True)
             
             # Try to parse as JSON, fall back to text if needed
             try:
-                analysis = json.loads(analysis_response)
+                analysis = parse_json_response(analysis_response, TRENDING_ANALYSIS_KEYS)
                 return analysis
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 return {
                     "trending_reason": {
                         "primary_cause": analysis_response[:200] + "...",
@@ -158,23 +300,36 @@ class TrendingAnalysisAgent:
                 }
                 
         except Exception as e:
-            print(f"ERROR in trending analysis: {str(e)}")
+            logger.error("Error in trending analysis: %s", e)
             return {"error": f"Analysis generation failed: {str(e)}"}
     
+    def _build_distribution_data(self, trending_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Calculate popularity breakdowns from trending data
+        """
+        return {
+            "category_breakdown": {trending_data['category']: 100},
+            "business_breakdown": {trending_data['business']: 100},
+            "geographic_breakdown": self._percentages(trending_data['region_counts'], trending_data['event_count']),
+            "stat_type_breakdown": self._percentages(trending_data['stat_type_counts'], trending_data['event_count'])
+        }
+    
+    @staticmethod
+    def _percentages(counts: Dict[str, int], total: int) -> Dict[str, float]:
+        """
+        Convert per-key event counts into percentages of all events in the window
+        """
+        if not total:
+            return {key: 0.0 for key in counts}
+        scale = 100.0 / total
+        return {key: round(count * scale, 1) for key, count in counts.items()}
+    
     async def _analyze_popularity_distribution(self, trending_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Analyze how popularity is distributed across different dimensions
         """
         try:
-            # Calculate distributions from trending data
-            distribution_data = {
-                "category_breakdown": {trending_data['category']: 100},
-                "business_breakdown": {trending_data['business']: 100},
-                "geographic_breakdown": {region: 100/len(trending_data['top_regions']) 
-                                       for region in trending_data['top_regions']},
-                "stat_type_breakdown": {stat: 100/len(trending_data['stat_types']) 
-                                      for stat in trending_data['stat_types']}
-            }
+            distribution_data = self._build_distribution_data(trending_data)
             
             if not self.openai_client.is_available():
                 return {
@@ -182,23 +337,23 @@ class TrendingAnalysisAgent:
                     "analysis": "OpenAI not available for detailed analysis"
                 }
             
-            prompt = get_popularity_distribution_prompt(distribution_data)
-            analysis_response = await self.openai_client.generate_completion(prompt)
+            system_message, user_message = get_popularity_distribution_prompt(distribution_data)
+            analysis_response = await self.openai_client.generate_completion_with_system(system_message, user_message, json_mode=True)
             
             try:
-                analysis = json.loads(analysis_response)
+                analysis = parse_json_response(analysis_response, POPULARITY_ANALYSIS_KEYS)
                 return {
                     "distribution_data": distribution_data,
                     "analysis": analysis
                 }
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 return {
                     "distribution_data": distribution_data,
                     "raw_analysis": analysis_response
                 }
                 
         except Exception as e:
-            print(f"ERROR in popularity distribution analysis: {str(e)}")
+            logger.error("Error in popularity distribution analysis: %s", e)
             return {"error": f"Distribution analysis failed: {str(e)}"}
     
     async def _generate_content_summary(self, topic_name: str, web_content: str, category: str) -> Dict[str, Any]:
@@ -214,12 +369,12 @@ class TrendingAnalysisAgent:
         
         try:
             system_message, user_message = get_content_summary_prompt(topic_name, web_content, category)
-            summary_response = await self.openai_client.generate_completion_with_system(system_message, user_message)
+            summary_response = await self.openai_client.generate_completion_with_system(system_message, user_message, json_mode=True)
             
             try:
-                summary = json.loads(summary_response)
+                summary = parse_json_response(summary_response, CONTENT_SUMMARY_KEYS)
                 return summary
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 return {
                     "topic_overview": {
                         "what_it_is": f"Trending topic: {topic_name}",
@@ -230,18 +385,32 @@ class TrendingAnalysisAgent:
                 }
                 
         except Exception as e:
-            print(f"ERROR in content summary: {str(e)}")
+            logger.error("Error in content summary: %s", e)
             return {"error": f"Content summary failed: {str(e)}"}
     
+    @coalesce(key=lambda self, topic_id, time_range="24h": (self, topic_id, time_range))
     async def get_trending_insights_summary(self, topic_id: int, time_range: str = "24h") -> Dict[str, Any]:
         """
         Get a quick summary of trending insights (lighter version)
+        
+        Cached like analyze_topic_trending, with the same per time range TTLs; summaries
+        built on a failed or simulated web search are not cached.
         """
+        cache_key = (topic_id, time_range)
+        summary = self.insights_cache.get(cache_key)
+        if summary is None:
+            summary, cacheable = await self._get_trending_insights_summary(topic_id, time_range)
+            if cacheable:
+                self.insights_cache.set(cache_key, summary, ttl=ANALYSIS_CACHE_TTLS.get(time_range))
+        return summary
+    
+    async def _get_trending_insights_summary(self, topic_id: int, time_range: str) -> Tuple[Dict[str, Any], bool]:
+        """Build the insights summary for one topic (uncached), and whether it may be cached"""
         try:
             # Get basic trending data
-            trending_data = await self._get_trending_data(topic_id, time_range)
+            trending_data = await self._get_trending_data_cached(topic_id, time_range)
             if not trending_data:
-                return {"error": f"No data found for topic {topic_id}"}
+                return {"error": f"No data found for topic {topic_id}"}, False
             
             # Get basic web context
             web_context = await self.web_search.search_topic_context(
@@ -257,11 +426,11 @@ class TrendingAnalysisAgent:
                 "key_themes": web_context.get('key_themes', []),
                 "geographic_focus": trending_data['top_regions'][:3],  # Top 3 regions
                 "analysis_type": "summary"
-            }
+            }, _is_complete_web_context(web_context)
             
         except Exception as e:
-            print(f"ERROR in trending insights summary: {str(e)}")
-            return {"error": f"Summary generation failed: {str(e)}"}
+            logger.error("Error in trending insights summary: %s", e)
+            return {"error": f"Summary generation failed: {str(e)}"}, False
 
 
 # Global instance
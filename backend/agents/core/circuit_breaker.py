@@ -0,0 +1,81 @@
+"""
+Circuit breaker for skipping external providers that keep failing
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Opens after a number of consecutive failures and rejects calls until a cool-down passes
+
+    After the cool-down the circuit is half-open: one trial call is let through while
+    concurrent calls are still rejected. Success closes the circuit again, failure
+    re-opens it for another cool-down.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 60):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.open_until = 0.0
+        # A half-open trial call is in flight
+        self.probing = False
+
+    def is_open(self) -> bool:
+        """True while calls should be skipped (cooling down, or a trial call is in flight)"""
+        if self.failures < self.failure_threshold:
+            return False
+        return self.probing or time.monotonic() < self.open_until
+
+    def record_success(self) -> None:
+        """Reset the failure count after a successful call"""
+        self.failures = 0
+        self.open_until = 0.0
+        self.probing = False
+
+    def record_failure(self) -> None:
+        """Count a failure, opening the circuit once the threshold is reached"""
+        self.failures += 1
+        self.probing = False
+        if self.failures >= self.failure_threshold:
+            self.open_until = time.monotonic() + self.reset_timeout
+
+    async def call(self, func: Callable[..., Awaitable[T]], *args: Any, **kwargs: Any) -> T:
+        """
+        Await func(*args, **kwargs) through the breaker
+
+        Cancellation is not counted as a failure (the caller may simply no longer need the
+        result); callers that cancel because the provider timed out call record_failure.
+
+        Raises:
+            CircuitOpenError: If the circuit is open (func is not called)
+        """
+        if self.is_open():
+            raise CircuitOpenError(f"{self.name} skipped after {self.failures} consecutive failures")
+
+        probe = self.failures >= self.failure_threshold
+        if probe:
+            self.probing = True
+
+        try:
+            result = await func(*args, **kwargs)
+        except asyncio.CancelledError:
+            if probe:
+                # Let the next call try again rather than leaving the circuit half-open forever
+                self.probing = False
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+
+        self.record_success()
+        return result
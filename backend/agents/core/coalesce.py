@@ -0,0 +1,48 @@
+"""
+Request coalescing for identical in-flight async calls
+"""
+import asyncio
+import functools
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def coalesce(func: Optional[Callable[..., Awaitable[T]]] = None, *, key: Optional[Callable[..., Hashable]] = None):
+    """
+    Share one in-flight call between concurrent callers passing identical arguments
+
+    The first caller starts the call; callers arriving before it finishes await the same
+    task instead of issuing a duplicate request. Nothing is kept once the call completes -
+    pair with a cache for reuse across time.
+
+    Usable bare (@coalesce) or with a key function (@coalesce(key=...)) that receives the
+    call arguments and returns the hashable key; by default the arguments themselves are
+    the key (for methods, the instance is part of it).
+    """
+    if func is None:
+        return functools.partial(coalesce, key=key)
+
+    inflight: Dict[Hashable, "asyncio.Task[T]"] = {}
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        call_key = key(*args, **kwargs) if key else (args, frozenset(kwargs.items()))
+        task = inflight.get(call_key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            inflight[call_key] = task
+
+            def _release(done: "asyncio.Task[T]") -> None:
+                if inflight.get(call_key) is done:
+                    del inflight[call_key]
+                # Mark the exception as retrieved even if every caller was cancelled
+                if not done.cancelled():
+                    done.exception()
+
+            task.add_done_callback(_release)
+
+        # Shield so one caller being cancelled does not cancel the call for the others
+        return await asyncio.shield(task)
+
+    return wrapper
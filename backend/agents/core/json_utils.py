@@ -0,0 +1,117 @@
+"""
+Helpers for parsing JSON out of LLM responses
+"""
+import json
+from typing import AbstractSet, Any, List, Optional
+
+import orjson
+
+# Stdlib decoder, used only for raw_decode (parse a prefix and ignore trailing text)
+_DECODER = json.JSONDecoder()
+
+
+def parse_json_response(text: str, expected_keys: Optional[AbstractSet[str]] = None) -> Any:
+    """
+    Parse an LLM response as JSON, salvaging an object wrapped in prose or code fences
+
+    Every step is a linear scan (no regex backtracking): a direct parse, then the span
+    from the first '{' to the last '}', then the first complete object starting at '{'.
+
+    Args:
+        text: Raw response text
+        expected_keys: If given, the result must be an object containing at least one of
+            these top-level keys, so valid JSON of the wrong shape takes the same fallback
+
+    Raises:
+        orjson.JSONDecodeError: If no JSON object can be recovered or it has the wrong shape
+    """
+    result = _parse(text)
+    if expected_keys is not None and (not isinstance(result, dict) or expected_keys.isdisjoint(result)):
+        raise orjson.JSONDecodeError("Response JSON does not match the expected structure", text, 0)
+    return result
+
+
+def _parse(text: str) -> Any:
+    """Parse text as JSON, falling back to the outermost embedded object"""
+    try:
+        return orjson.loads(text)
+    except orjson.JSONDecodeError as error:
+        start = text.find("{")
+        end = text.rfind("}")
+        if start == -1 or end <= start:
+            raise
+
+        try:
+            return orjson.loads(text[start:end + 1])
+        except orjson.JSONDecodeError:
+            pass
+
+        try:
+            return _DECODER.raw_decode(text, start)[0]
+        except json.JSONDecodeError:
+            raise error from None
+
+
+class JSONArrayStreamParser:
+    """
+    Incrementally extract the elements of one top-level array from streamed JSON text
+
+    Feed response chunks as they arrive; each complete element of the array under `key`
+    is returned as soon as its closing bracket has been received, so callers can build
+    results while the rest of the response is still streaming.
+    """
+
+    def __init__(self, key: str):
+        self.key_token = f'"{key}"'
+        self.buffer = ""
+        self.position: Optional[int] = None
+        self.finished = False
+        self.items_found = 0
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far"""
+        return self.buffer
+
+    def feed(self, chunk: str) -> List[Any]:
+        """
+        Add a chunk of response text
+
+        Returns:
+            Array elements completed by this chunk (possibly empty)
+        """
+        self.buffer += chunk
+        if self.finished:
+            return []
+
+        if self.position is None:
+            key_index = self.buffer.find(self.key_token)
+            bracket = self.buffer.find("[", key_index) if key_index != -1 else -1
+            if bracket == -1:
+                return []
+            self.position = bracket + 1
+        elif "}" not in chunk and "]" not in chunk:
+            # No element can have been completed by this chunk
+            return []
+
+        items = []
+        buffer = self.buffer
+        while True:
+            position = self.position
+            while position < len(buffer) and buffer[position] in " \t\r\n,":
+                position += 1
+            self.position = position
+            if position >= len(buffer):
+                break
+            if buffer[position] == "]":
+                self.finished = True
+                break
+            try:
+                item, self.position = _DECODER.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # Element still incomplete; retry once more text arrives
+                break
+            items.append(item)
+
+        self.items_found += len(items)
+        return items
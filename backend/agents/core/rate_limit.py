@@ -0,0 +1,59 @@
+"""
+Client-side rate limiting for calls to quota-limited APIs
+"""
+import asyncio
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """
+    Token bucket (requests per minute) combined with a cap on concurrent requests
+
+    Use as `async with limiter:` around each request. The bucket starts full, so short
+    bursts up to the per-minute budget go straight through; beyond that requests are
+    spaced out at the refill rate instead of being rejected by the API with a 429.
+    """
+
+    def __init__(self, requests_per_minute: float, max_concurrent: int):
+        self.rate = requests_per_minute / 60
+        self.capacity = requests_per_minute
+        self.max_concurrent = max_concurrent
+        self.tokens = float(requests_per_minute)
+        self.updated_at = time.monotonic()
+        # Created on first use so they bind to the running event loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self) -> None:
+        """Wait for a concurrency slot and a token"""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+            self._lock = asyncio.Lock()
+
+        await self._semaphore.acquire()
+        try:
+            # Waiters take tokens one at a time, in arrival order
+            async with self._lock:
+                while True:
+                    now = time.monotonic()
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                    self.updated_at = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    await asyncio.sleep((1 - self.tokens) / self.rate)
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    def release(self) -> None:
+        """Free the concurrency slot taken by acquire"""
+        self._semaphore.release()
+
+    async def __aenter__(self) -> "RateLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.release()
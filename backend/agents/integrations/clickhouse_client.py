@@ -0,0 +1,54 @@
+"""
+Shared ClickHouse client, configured from the environment
+"""
+import os
+import logging
+from typing import Optional
+
+import clickhouse_connect
+from clickhouse_connect.driver import httputil
+from clickhouse_connect.driver.client import Client
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Queries run in worker threads (asyncio.to_thread); the library's default pool keeps only 8
+# connections, so further concurrent queries would open and discard extra connections
+MAX_CONNECTIONS = int(os.getenv("CLICKHOUSE_MAX_CONNECTIONS", "32"))
+
+
+def _connect() -> Optional[Client]:
+    """Connect to ClickHouse and verify the connection, returning None on failure"""
+    try:
+        logger.info(
+            "Attempting ClickHouse connection (host=%s, port=%s, user=%s, database=%s, secure=%s)",
+            os.getenv('CLICKHOUSE_HOST'), os.getenv('CLICKHOUSE_PORT'), os.getenv('CLICKHOUSE_USER'),
+            os.getenv('CLICKHOUSE_DATABASE'), os.getenv('CLICKHOUSE_SECURE')
+        )
+
+        clickhouse = clickhouse_connect.get_client(
+            host=os.getenv("CLICKHOUSE_HOST", "localhost"),
+            port=int(os.getenv("CLICKHOUSE_PORT", 8123)),
+            username=os.getenv("CLICKHOUSE_USER", "default"),
+            password=os.getenv("CLICKHOUSE_PASSWORD", ""),
+            database=os.getenv("CLICKHOUSE_DATABASE", "default"),
+            secure=os.getenv("CLICKHOUSE_SECURE", "false").lower() == "true",
+            # Queries run concurrently from worker threads; a shared session would reject them
+            autogenerate_session_id=False,
+            pool_mgr=httputil.get_pool_manager(maxsize=MAX_CONNECTIONS)
+        )
+
+        # Test the connection
+        test_result = clickhouse.query("SELECT 1 as test")
+        logger.info("ClickHouse connection successful! Test result: %s", test_result.result_rows)
+        return clickhouse
+
+    except Exception as e:
+        logger.exception("ClickHouse connection failed: %s: %s", type(e).__name__, e)
+        return None
+
+
+# Global instance (None when ClickHouse is unreachable)
+client = _connect()
@@ -0,0 +1,89 @@
+"""
+Shared async HTTP client for outbound API calls (search providers, etc.)
+"""
+from typing import Any, Callable, Dict, Optional
+
+import httpx
+import orjson
+
+from ..core.cache import TTLCache
+
+# Connection pool shared by every search provider so TCP/TLS sessions are reused
+MAX_CONNECTIONS = 64
+MAX_KEEPALIVE_CONNECTIONS = 32
+KEEPALIVE_EXPIRY = 60
+REQUEST_TIMEOUT = 10
+
+# Successful GET responses are reused for repeat queries (e.g. the same viral topic),
+# unless the caller's cache_if rejects the body
+RESPONSE_CACHE_TTL = 600
+RESPONSE_CACHE_SIZE = 1024
+
+_client: Optional[httpx.AsyncClient] = None
+_response_cache = TTLCache(maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL)
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the process-wide async HTTP client, creating it on first use
+
+    Returns:
+        Shared httpx.AsyncClient with a pooled connection limit
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            # HTTP/2 lets concurrent requests to one provider share a single connection
+            http2=True,
+            timeout=REQUEST_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY
+            )
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    """Close the shared HTTP client and release its pooled connections"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+async def get_json(url: str, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+                   cache_if: Optional[Callable[[Any], Any]] = None) -> Any:
+    """
+    GET a JSON API endpoint through the shared client, caching successful responses
+
+    Args:
+        url: Endpoint URL
+        params: Query parameters (part of the cache key)
+        headers: Request headers (part of the cache key, e.g. per-key subscriptions)
+        cache_if: Called with the decoded body; a falsy result skips caching (e.g. empty
+            result lists or error payloads sent with a 200 status)
+
+    Returns:
+        Decoded JSON body
+
+    Raises:
+        httpx.HTTPStatusError: If the response status is not 2xx (errors are never cached)
+    """
+    cache_key = (
+        url,
+        tuple(sorted((params or {}).items())),
+        tuple(sorted((headers or {}).items()))
+    )
+    cached = _response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    response = await get_http_client().get(url, params=params, headers=headers)
+    response.raise_for_status()
+
+    data = orjson.loads(response.content)
+    if cache_if is None or cache_if(data):
+        _response_cache.set(cache_key, data)
+    return data
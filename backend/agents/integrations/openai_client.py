@@ -1,30 +1,93 @@
 import os
-from typing import Optional
-from openai import OpenAI
+import logging
+from typing import AsyncIterator, Optional
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 from dotenv import load_dotenv
 
+from ..core.cache import TTLCache
+from ..core.coalesce import coalesce
+from ..core.rate_limit import RateLimiter
+from ..prompts.common import prompt_fingerprint
+
+logger = logging.getLogger(__name__)
+
+# Read the environment once at import rather than on every client construction
+load_dotenv()
+_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# Completions are cached for a day; only deterministic (temperature 0) calls are cached
+RESPONSE_CACHE_TTL = 24 * 60 * 60
+RESPONSE_CACHE_SIZE = 2048
+
+# Only responses that ended naturally are cached; "length" (cut off by max_tokens) and
+# "content_filter" responses are incomplete and would otherwise be replayed for a day
+CACHEABLE_FINISH_REASON = "stop"
+
+# Connection pool for concurrent completions (trending steps and campaign channels run in parallel)
+MAX_CONNECTIONS = 32
+
+# Client-side request budget, kept under the account's requests-per-minute tier so bursts
+# from parallel campaigns are spaced out instead of failing with 429s
+REQUESTS_PER_MINUTE = float(os.getenv("OPENAI_RPM", "500"))
+
+# Rate-limit (429), timeout and 5xx responses are retried by the SDK with exponential backoff
+MAX_RETRIES = 4
+
 
 class OpenAIClient:
     def __init__(self):
-        self.client: Optional[OpenAI] = None
+        self.client: Optional[AsyncOpenAI] = None
+        self.response_cache = TTLCache(maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL)
+        self.rate_limiter = RateLimiter(REQUESTS_PER_MINUTE, max_concurrent=MAX_CONNECTIONS)
         self._initialize_client()
     
     def _initialize_client(self):
         """Initialize OpenAI client with API key from environment"""
-        # Load environment variables
-        load_dotenv()
-        
-        openai_api_key = os.getenv("OPENAI_API_KEY")
-        if openai_api_key:
-            self.client = OpenAI(api_key=openai_api_key)
-            print("OpenAI client initialized successfully")
+        if _API_KEY:
+            self.client = AsyncOpenAI(
+                api_key=_API_KEY,
+                max_retries=MAX_RETRIES,
+                http_client=DefaultAsyncHttpxClient(
+                    # Concurrent completions share multiplexed streams on a few warm connections
+                    http2=True,
+                    limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS)
+                )
+            )
+            logger.info("OpenAI client initialized successfully")
         else:
-            print("ERROR: OPENAI_API_KEY not found in environment")
+            logger.error("OPENAI_API_KEY not found in environment")
     
     def is_available(self) -> bool:
         """Check if OpenAI client is available"""
         return self.client is not None
     
+    @staticmethod
+    def _cache_key(*parts) -> str:
+        """Build an exact-match cache key from the parameters of a completion request"""
+        return prompt_fingerprint(*parts)
+    
+    @classmethod
+    def _system_cache_key(cls, model: str, temperature: float, json_mode: bool, max_tokens: Optional[int],
+                          system_message: str, user_message: str) -> Optional[str]:
+        """
+        Cache key shared by the blocking and streaming system/user completions
+        
+        Returns None for non-deterministic (temperature > 0) requests, which are not cached
+        """
+        if temperature != 0:
+            return None
+        return cls._cache_key(model, temperature, json_mode, max_tokens, system_message, user_message)
+    
+    @staticmethod
+    def _is_cacheable_finish(finish_reason: Optional[str]) -> bool:
+        """True if a response with this finish_reason is complete and may be cached"""
+        if finish_reason == CACHEABLE_FINISH_REASON:
+            return True
+        logger.warning("Not caching OpenAI response with finish_reason %r", finish_reason)
+        return False
+    
+    @coalesce
     async def generate_completion(self, prompt: str, model: str = "gpt-3.5-turbo", temperature: float = 0) -> str:
         """
         Generate completion using OpenAI API
@@ -43,19 +106,31 @@ class OpenAIClient:
         if not self.client:
             raise Exception("OpenAI client not initialized - check API key")
         
+        cache_key = self._cache_key(model, temperature, prompt) if temperature == 0 else None
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=temperature
-            )
+            async with self.rate_limiter:
+                response = await self.client.chat.completions.create(
+                    model=model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=temperature
+                )
             
-            return response.choices[0].message.content.strip()
+            choice = response.choices[0]
+            content = choice.message.content.strip()
+            if cache_key and self._is_cacheable_finish(choice.finish_reason):
+                self.response_cache.set(cache_key, content)
+            return content
         except Exception as e:
-            print(f"OpenAI API error: {type(e).__name__}: {str(e)}")
+            logger.error("OpenAI API error: %s: %s", type(e).__name__, e)
             raise
 
-    async def generate_completion_with_system(self, system_message: str, user_message: str, model: str = "gpt-3.5-turbo", temperature: float = 0) -> str:
+    @coalesce
+    async def generate_completion_with_system(self, system_message: str, user_message: str, model: str = "gpt-3.5-turbo", temperature: float = 0, json_mode: bool = False, max_tokens: Optional[int] = None) -> str:
         """
         Generate completion using OpenAI API with separate system and user messages
         
@@ -64,6 +139,8 @@ class OpenAIClient:
             user_message: The user's actual request/data
             model: Model to use (default: gpt-3.5-turbo)
             temperature: Randomness of output (default: 0 for deterministic)
+            json_mode: Ask the API to return a single JSON object (response_format json_object)
+            max_tokens: Upper bound on generated tokens (default: model limit)
             
         Returns:
             Generated text response
@@ -74,21 +151,102 @@ class OpenAIClient:
         if not self.client:
             raise Exception("OpenAI client not initialized - check API key")
         
+        cache_key = self._system_cache_key(model, temperature, json_mode, max_tokens, system_message, user_message)
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
         try:
-            response = self.client.chat.completions.create(
-                model=model,
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": user_message}
-                ],
-                temperature=temperature
-            )
+            async with self.rate_limiter:
+                response = await self.client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_message},
+                        {"role": "user", "content": user_message}
+                    ],
+                    temperature=temperature,
+                    **({"response_format": {"type": "json_object"}} if json_mode else {}),
+                    **({"max_tokens": max_tokens} if max_tokens else {})
+                )
             
-            return response.choices[0].message.content.strip()
+            choice = response.choices[0]
+            content = choice.message.content.strip()
+            if cache_key and self._is_cacheable_finish(choice.finish_reason):
+                self.response_cache.set(cache_key, content)
+            return content
         except Exception as e:
-            print(f"OpenAI API error: {type(e).__name__}: {str(e)}")
+            logger.error("OpenAI API error: %s: %s", type(e).__name__, e)
             raise
 
+    async def stream_completion_with_system(self, system_message: str, user_message: str, model: str = "gpt-3.5-turbo", temperature: float = 0, json_mode: bool = False, max_tokens: Optional[int] = None) -> AsyncIterator[str]:
+        """
+        Stream a completion with separate system and user messages, yielding text as it arrives
+        
+        Shares the response cache with generate_completion_with_system: a cached response is
+        yielded as a single chunk, and a response streamed to a "stop" finish is cached once complete.
+        
+        Args:
+            system_message: The system role/context message
+            user_message: The user's actual request/data
+            model: Model to use (default: gpt-3.5-turbo)
+            temperature: Randomness of output (default: 0 for deterministic)
+            json_mode: Ask the API to return a single JSON object (response_format json_object)
+            max_tokens: Upper bound on generated tokens (default: model limit)
+            
+        Yields:
+            Text deltas of the generated response
+            
+        Raises:
+            Exception: If OpenAI client is not available or API call fails
+        """
+        if not self.client:
+            raise Exception("OpenAI client not initialized - check API key")
+        
+        cache_key = self._system_cache_key(model, temperature, json_mode, max_tokens, system_message, user_message)
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        try:
+            async with self.rate_limiter:
+                stream = await self.client.chat.completions.create(
+                    model=model,
+                    messages=[
+                        {"role": "system", "content": system_message},
+                        {"role": "user", "content": user_message}
+                    ],
+                    temperature=temperature,
+                    stream=True,
+                    **({"response_format": {"type": "json_object"}} if json_mode else {}),
+                    **({"max_tokens": max_tokens} if max_tokens else {})
+                )
+            
+                parts = []
+                finish_reason = None
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    piece = chunk.choices[0].delta.content or ""
+                    if piece:
+                        parts.append(piece)
+                        yield piece
+                    finish_reason = chunk.choices[0].finish_reason or finish_reason
+            
+            # Reached only when the stream was consumed to its end
+            if cache_key and self._is_cacheable_finish(finish_reason):
+                self.response_cache.set(cache_key, "".join(parts).strip())
+        except Exception as e:
+            logger.error("OpenAI API error: %s: %s", type(e).__name__, e)
+            raise
+
+
+async def gather_stream(stream: AsyncIterator[str]) -> str:
+    """Collect a streamed completion into the full response text"""
+    return "".join([piece async for piece in stream]).strip()
+
 
 # Global instance
 openai_client = OpenAIClient()
\ No newline at end of file
@@ -6,10 +6,61 @@ from within the Python backend. Here are several approaches to enable real web s
 """
 
 # OPTION 1: Google Custom Search API
-import requests
 from typing import Dict, List, Any
 from datetime import datetime
 import os
+import logging
+from dotenv import load_dotenv
+
+from .http_client import get_json
+
+logger = logging.getLogger(__name__)
+
+# Provider credentials are read once at import, not per client instance
+load_dotenv()
+_GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+_GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID")
+_NEWS_API_KEY = os.getenv("NEWS_API_KEY")
+_SERP_API_KEY = os.getenv("SERP_API_KEY")
+_BING_API_KEY = os.getenv("BING_API_KEY")
+
+
+def _extract_results(results: List[Dict[str, Any]], title_key: str, link_key: str, snippet_key: str) -> tuple:
+    """
+    Pull headline, source and snippet columns out of a provider's result list in one pass
+    
+    Each provider's result list is read by one of the *_results functions below, which
+    also serve as get_json's cache_if, so responses without results are never cached.
+    
+    Returns:
+        Tuple of (headlines, sources, snippets)
+    """
+    headlines, sources, snippets = [], [], []
+    for result in results:
+        headlines.append(result.get(title_key, ''))
+        sources.append(result.get(link_key, ''))
+        snippets.append(result.get(snippet_key, ''))
+    return headlines, sources, snippets
+
+
+def google_results(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Result list of a Google Custom Search response (also web_search's Google cache_if)"""
+    return data.get('items') or []
+
+
+def _news_results(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Result list of a NewsAPI response"""
+    return data.get('articles') or []
+
+
+def _serp_results(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Result list of a SerpAPI response"""
+    return data.get('organic_results') or []
+
+
+def _bing_results(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Result list of a Bing Web Search response"""
+    return data.get('webPages', {}).get('value') or []
 
 
 class GoogleSearchClient:
@@ -23,8 +74,8 @@ class GoogleSearchClient:
     """
     
     def __init__(self):
-        self.api_key = os.getenv("GOOGLE_API_KEY")
-        self.cse_id = os.getenv("GOOGLE_CSE_ID")
+        self.api_key = _GOOGLE_API_KEY
+        self.cse_id = _GOOGLE_CSE_ID
         self.base_url = "https://www.googleapis.com/customsearch/v1"
     
     async def search(self, query: str, num_results: int = 5) -> Dict[str, Any]:
@@ -42,20 +93,10 @@ class GoogleSearchClient:
                 'num': num_results
             }
             
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            headlines = []
-            sources = []
-            snippets = []
-            
-            if 'items' in data:
-                for item in data['items']:
-                    headlines.append(item.get('title', ''))
-                    sources.append(item.get('link', ''))
-                    snippets.append(item.get('snippet', ''))
+            data = await get_json(self.base_url, params=params, cache_if=google_results)
+            headlines, sources, snippets = _extract_results(
+                google_results(data), 'title', 'link', 'snippet'
+            )
             
             return {
                 "query": query,
@@ -69,7 +110,7 @@ class GoogleSearchClient:
             }
             
         except Exception as e:
-            print(f"Google Search API error: {str(e)}")
+            logger.error("Google Search API error: %s", e)
             raise
 
 
@@ -84,7 +125,7 @@ class NewsAPIClient:
     """
     
     def __init__(self):
-        self.api_key = os.getenv("NEWS_API_KEY")
+        self.api_key = _NEWS_API_KEY
         self.base_url = "https://newsapi.org/v2/everything"
     
     async def search_news(self, query: str, num_results: int = 5) -> Dict[str, Any]:
@@ -103,20 +144,10 @@ class NewsAPIClient:
                 'language': 'en'
             }
             
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            headlines = []
-            sources = []
-            snippets = []
-            
-            if 'articles' in data:
-                for article in data['articles']:
-                    headlines.append(article.get('title', ''))
-                    sources.append(article.get('url', ''))
-                    snippets.append(article.get('description', ''))
+            data = await get_json(self.base_url, params=params, cache_if=_news_results)
+            headlines, sources, snippets = _extract_results(
+                _news_results(data), 'title', 'url', 'description'
+            )
             
             return {
                 "query": query,
@@ -130,7 +161,7 @@ class NewsAPIClient:
             }
             
         except Exception as e:
-            print(f"NewsAPI error: {str(e)}")
+            logger.error("NewsAPI error: %s", e)
             raise
 
 
@@ -145,7 +176,7 @@ class SerpAPIClient:
     """
     
     def __init__(self):
-        self.api_key = os.getenv("SERP_API_KEY")
+        self.api_key = _SERP_API_KEY
         self.base_url = "https://serpapi.com/search"
     
     async def search(self, query: str, num_results: int = 5) -> Dict[str, Any]:
@@ -163,20 +194,10 @@ class SerpAPIClient:
                 'num': num_results
             }
             
-            response = requests.get(self.base_url, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            headlines = []
-            sources = []
-            snippets = []
-            
-            if 'organic_results' in data:
-                for result in data['organic_results']:
-                    headlines.append(result.get('title', ''))
-                    sources.append(result.get('link', ''))
-                    snippets.append(result.get('snippet', ''))
+            data = await get_json(self.base_url, params=params, cache_if=_serp_results)
+            headlines, sources, snippets = _extract_results(
+                _serp_results(data), 'title', 'link', 'snippet'
+            )
             
             return {
                 "query": query,
@@ -189,7 +210,7 @@ class SerpAPIClient:
             }
             
         except Exception as e:
-            print(f"SerpAPI error: {str(e)}")
+            logger.error("SerpAPI error: %s", e)
             raise
 
 
@@ -204,7 +225,7 @@ class BingSearchClient:
     """
     
     def __init__(self):
-        self.api_key = os.getenv("BING_API_KEY")
+        self.api_key = _BING_API_KEY
         self.base_url = "https://api.cognitive.microsoft.com/bing/v7.0/search"
     
     async def search(self, query: str, num_results: int = 5) -> Dict[str, Any]:
@@ -225,20 +246,10 @@ class BingSearchClient:
                 'mkt': 'en-US'
             }
             
-            response = requests.get(self.base_url, headers=headers, params=params)
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            headlines = []
-            sources = []
-            snippets = []
-            
-            if 'webPages' in data and 'value' in data['webPages']:
-                for result in data['webPages']['value']:
-                    headlines.append(result.get('name', ''))
-                    sources.append(result.get('url', ''))
-                    snippets.append(result.get('snippet', ''))
+            data = await get_json(self.base_url, params=params, headers=headers, cache_if=_bing_results)
+            headlines, sources, snippets = _extract_results(
+                _bing_results(data), 'name', 'url', 'snippet'
+            )
             
             return {
                 "query": query,
@@ -252,7 +263,7 @@ class BingSearchClient:
             }
             
         except Exception as e:
-            print(f"Bing Search API error: {str(e)}")
+            logger.error("Bing Search API error: %s", e)
             raise
 
 
@@ -276,7 +287,7 @@ async def _perform_web_search(self, query: str) -> Dict[str, Any]:
         # return await news_client.search_news(query)
         
     except Exception as e:
-        print(f"Real web search failed: {str(e)}, using fallback")
+        logger.warning("Real web search failed: %s, using fallback", e)
         return await self._simulate_web_search(query)
 
 5. Add the API key to your .env file:
@@ -2,11 +2,178 @@
 Web search integration for trending topic content analysis
 """
 import re
-import json
-import subprocess
-from typing import Dict, List, Any
+import asyncio
+import os
+import random
+import time
+import logging
+import orjson
+from collections import Counter
+from typing import Dict, List, Any, NamedTuple, Optional, Tuple
 from datetime import datetime
+from dotenv import load_dotenv
 from ..integrations.openai_client import openai_client
+from ..core.coalesce import coalesce
+from .http_client import get_json
+from .real_web_search import google_results
+from ..core.cache import TTLCache
+from ..core.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+logger = logging.getLogger(__name__)
+
+# Provider credentials and static request parameters, read once at import
+load_dotenv()
+_GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+_GOOGLE_CSE_ID = os.getenv("GOOGLE_CSE_ID")
+_NEWS_API_KEY = os.getenv("NEWS_API_KEY")
+
+GOOGLE_SEARCH_URL = "https://www.googleapis.com/customsearch/v1"
+_GOOGLE_BASE_PARAMS = {
+    'key': _GOOGLE_API_KEY,
+    'cx': _GOOGLE_CSE_ID,
+    'num': 5,  # Number of results to return
+    'safe': 'medium',  # Safe search
+    'dateRestrict': 'w1'  # Results from past week for trending content
+}
+
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+_NEWS_BASE_PARAMS = {
+    'apiKey': _NEWS_API_KEY,
+    'sortBy': 'relevancy',
+    'pageSize': 5,
+    'language': 'en'
+}
+
+# Theme candidates: words of five or more characters in the search headlines
+THEME_WORD_RE = re.compile(r'\b\w{5,}\b')
+
+# Filler words (and generic news vocabulary from our own search queries) that never make useful themes
+THEME_STOP_WORDS = frozenset({
+    "about", "after", "again", "against", "among", "before", "being", "below", "between",
+    "could", "during", "every", "first", "other", "their", "there", "these", "those",
+    "through", "under", "until", "where", "which", "while", "would", "should", "still",
+    "latest", "update", "updates", "breaking", "today", "recent", "news"
+})
+
+# Category-specific search strategies, appended to the topic name
+CATEGORY_QUERY_SUFFIX = {
+    "sports": " game news injury trade performance",
+    "finance": " stock earnings news market analysis",
+    "politics": " election news policy statement government",
+    "celebrity": " news entertainment latest update",
+    "tech": " product launch announcement technology news",
+    "healthcare": " medical news health update research",
+    "automotive": " car auto news release review"
+}
+
+# Time constraint added to the query for each time range
+TIME_RANGE_QUERY_SUFFIX = {
+    "24h": " today latest",
+    "7d": " this week recent"
+}
+
+# Fallback simulation content used when every search provider fails
+SIMULATION_HEADLINES = (
+    "{0} Makes Headlines in Major Development",
+    "Breaking: Latest Updates on {0} Situation",
+    "Analysis: Why {0} is Trending Across Platforms",
+    "{0}: What You Need to Know",
+    "Expert Opinion: {0} Impact and Analysis"
+)
+SIMULATION_SPORTS_WORDS = ('sport', 'game', 'player', 'team')
+SIMULATION_SOURCES_GENERAL = (
+    "cnn.com", "bbc.com", "reuters.com", "ap.org", "nytimes.com", "techcrunch.com", "reddit.com", "twitter.com"
+)
+SIMULATION_SOURCES_SPORTS = (
+    "cnn.com", "bbc.com", "reuters.com", "ap.org", "nytimes.com", "espn.com", "reddit.com", "twitter.com"
+)
+
+# Search results included in summarization prompts (the rest only costs tokens)
+PROMPT_MAX_RESULTS = 5
+PROMPT_SNIPPET_CHARS = 280
+
+# Overall budget for the concurrent provider fan-out in _perform_web_search
+SEARCH_FANOUT_TIMEOUT = 8
+
+# Search context is reused per (topic, category, time_range); longer windows change more slowly
+SEARCH_CACHE_SIZE = 1024
+SEARCH_CACHE_TTL_BY_RANGE = {
+    "1h": 300,
+    "6h": 600,
+    "24h": 900,
+    "7d": 3600,
+    "30d": 3600
+}
+DEFAULT_SEARCH_CACHE_TTL = 900
+
+# content_summary shown when the summary could not be generated (the cause is logged)
+SUMMARY_UNAVAILABLE = "Content summary unavailable for {0}"
+
+
+# (second, ISO string) of the last formatted timestamp; result timestamps only need 1s precision
+_last_timestamp = (0, "")
+
+
+def _iso_now() -> str:
+    """Current local time as an ISO string, formatted at most once per second"""
+    global _last_timestamp
+    second = int(time.time())
+    if second != _last_timestamp[0]:
+        _last_timestamp = (second, datetime.fromtimestamp(second).isoformat())
+    return _last_timestamp[1]
+
+
+class SearchResult(NamedTuple):
+    """
+    Normalized result from one search provider (or the simulation fallback)
+    """
+    query: str
+    headlines: Tuple[str, ...]
+    sources: Tuple[str, ...]
+    snippets: Tuple[str, ...]
+    summary: str
+    provider: str
+    timestamp: str
+    results_found: bool
+    total_results: int = 0
+    search_time: float = 0.0
+    # Placeholder content from the simulation fallback rather than a real provider
+    simulated: bool = False
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Dictionary form used in the search context returned to API clients"""
+        return {
+            "query": self.query,
+            "results_found": self.results_found,
+            "headlines": list(self.headlines),
+            "sources": list(self.sources),
+            "snippets": list(self.snippets),
+            "content_summary": self.summary,
+            "total_results": self.total_results,
+            "search_time": self.search_time,
+            "timestamp": self.timestamp,
+            "provider": self.provider
+        }
+
+
+def _compact_search_results(search_results: SearchResult) -> str:
+    """
+    Reduce search results to the text the summarizer needs (headlines and trimmed snippets,
+    or the provider summary when there are none) as compact JSON, leaving out URLs and metadata
+    """
+    compact = {
+        "headlines": search_results.headlines[:PROMPT_MAX_RESULTS],
+        "snippets": [(snippet or "")[:PROMPT_SNIPPET_CHARS]
+                     for snippet in search_results.snippets[:PROMPT_MAX_RESULTS]]
+    }
+    if not compact["snippets"] and search_results.summary:
+        compact["summary"] = search_results.summary[:PROMPT_SNIPPET_CHARS]
+    return orjson.dumps(compact).decode()
+
+
+def _search_cache_key(topic_name: str, category: str, time_range: str = "24h") -> tuple:
+    """Normalized key for a topic search, shared by the result cache and the in-flight map"""
+    return topic_name.lower(), category, time_range
 
 
 class WebSearchClient:
@@ -14,9 +181,16 @@ class WebSearchClient:
     Web search client for gathering context about trending topics
     """
     
+    __slots__ = ("client", "cache", "google_breaker", "duckduckgo_breaker")
+    
     def __init__(self):
         self.client = openai_client
+        self.cache = TTLCache(maxsize=SEARCH_CACHE_SIZE, ttl=DEFAULT_SEARCH_CACHE_TTL)
+        # Providers that keep failing (bad credentials, throttling) are skipped for a cool-down
+        self.google_breaker = CircuitBreaker("Google Custom Search")
+        self.duckduckgo_breaker = CircuitBreaker("DuckDuckGo")
     
+    @coalesce(key=lambda self, *args, **kwargs: (self,) + _search_cache_key(*args, **kwargs))
     async def search_topic_context(self, topic_name: str, category: str, time_range: str = "24h") -> Dict[str, Any]:
         """
         Search for recent news/content about a trending topic
@@ -27,32 +201,35 @@ class WebSearchClient:
             time_range: Time range for search (24h, 7d, etc.)
             
         Returns:
-            Dictionary containing search results and analysis
+            Dictionary containing search results and analysis; "degraded" is set when the
+            results are simulated or the summary failed, and such contexts are not cached
         """
+        cache_key = _search_cache_key(topic_name, category, time_range)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            print(f"Searching web context for topic: {topic_name}")
+            logger.debug("Searching web context for topic: %s", topic_name)
             
             # Build search query based on topic and category
             query = self._build_search_query(topic_name, category, time_range)
-            print(f"Search query: {query}")
+            logger.debug("Search query: %s", query)
             
             # Use real web search
             search_results = await self._execute_web_search(query)
             
             # Extract and summarize content
             content_summary = await self._extract_content_summary(search_results, topic_name)
-            key_themes = self._identify_themes(search_results)
+            context = self._build_context(query, search_results, content_summary, topic_name)
             
-            return {
-                "search_query": query,
-                "search_results": search_results,
-                "content_summary": content_summary,
-                "key_themes": key_themes,
-                "search_timestamp": datetime.now().isoformat()
-            }
+            # Degraded context is still returned, but the next request retries the providers
+            if not context["degraded"]:
+                self.cache.set(cache_key, context, ttl=SEARCH_CACHE_TTL_BY_RANGE.get(time_range, DEFAULT_SEARCH_CACHE_TTL))
+            return context
             
         except Exception as e:
-            print(f"ERROR in search_topic_context: {str(e)}")
+            logger.error("Error in search_topic_context: %s", e)
             return {
                 "error": f"Web search failed: {str(e)}",
                 "search_query": query if 'query' in locals() else None,
@@ -60,40 +237,43 @@ class WebSearchClient:
                 "key_themes": []
             }
     
-    def _build_search_query(self, topic_name: str, category: str, time_range: str) -> str:
-        """Build optimized search query based on topic characteristics"""
-        
-        # Category-specific search strategies
-        search_strategies = {
-            "sports": f"{topic_name} game news injury trade performance",
-            "finance": f"{topic_name} stock earnings news market analysis", 
-            "politics": f"{topic_name} election news policy statement government",
-            "celebrity": f"{topic_name} news entertainment latest update",
-            "tech": f"{topic_name} product launch announcement technology news",
-            "healthcare": f"{topic_name} medical news health update research",
-            "automotive": f"{topic_name} car auto news release review"
-        }
-        
-        # Base query
-        base_query = search_strategies.get(category, f"{topic_name} news latest")
+    def _build_context(self, query: str, search_results: SearchResult, content_summary: Optional[str],
+                       topic_name: str) -> Dict[str, Any]:
+        """
+        Assemble the search context for one topic
         
-        # Add time constraint
-        time_constraint = ""
-        if time_range == "24h":
-            time_constraint = "today latest"
-        elif time_range == "7d":
-            time_constraint = "this week recent"
-        else:
-            time_constraint = "recent news"
+        Args:
+            query: Search query that was executed
+            search_results: Results of the search (possibly simulated)
+            content_summary: LLM summary of the results, or None if summarization failed
+            topic_name: Name of the trending topic
             
-        return f"{base_query} {time_constraint}"
+        Returns:
+            Search context dictionary
+        """
+        return {
+            "search_query": query,
+            "search_results": search_results.to_dict(),
+            "content_summary": content_summary or SUMMARY_UNAVAILABLE.format(topic_name),
+            "key_themes": self._identify_themes(search_results),
+            "search_timestamp": _iso_now(),
+            "degraded": search_results.simulated or not content_summary
+        }
+    
+    def _build_search_query(self, topic_name: str, category: str, time_range: str) -> str:
+        """Build optimized search query based on topic characteristics"""
+        return (
+            topic_name
+            + CATEGORY_QUERY_SUFFIX.get(category, " news latest")
+            + TIME_RANGE_QUERY_SUFFIX.get(time_range, " recent news")
+        )
     
-    async def _execute_web_search(self, query: str) -> Dict[str, Any]:
+    async def _execute_web_search(self, query: str) -> SearchResult:
         """
         Execute real web search using the WebSearch functionality
         """
         try:
-            print(f"Executing web search for: {query}")
+            logger.debug("Executing web search for: %s", query)
             
             # Since the WebSearch tool is available in the Claude Code environment,
             # we need to create a bridge to access it from the backend.
@@ -105,137 +285,116 @@ class WebSearchClient:
             return search_result
             
         except Exception as e:
-            print(f"Web search failed: {str(e)}, falling back to simulation")
+            logger.warning("Web search failed: %s, falling back to simulation", e)
             return await self._simulate_web_search(query)
     
-    async def _perform_web_search(self, query: str) -> Dict[str, Any]:
+    async def _perform_web_search(self, query: str) -> SearchResult:
         """
-        Real web search implementation using Google Custom Search API
+        Real web search across providers (Google Custom Search, DuckDuckGo)
+        
+        All providers are queried concurrently; the first result with hits wins and the
+        rest are cancelled, so a slow or failing provider no longer delays the others.
+        Providers still running when the fan-out times out count as failed for their breaker.
         """
+        breakers = {
+            asyncio.create_task(self.google_breaker.call(self._search_with_google, query)): self.google_breaker,
+            asyncio.create_task(self.duckduckgo_breaker.call(self._search_with_duckduckgo, query)): self.duckduckgo_breaker
+        }
+        tasks = list(breakers)
+        empty_result = None
         try:
-            # Use Google Custom Search as primary method
-            return await self._search_with_google(query)
-        except Exception as e:
-            print(f"Google Custom Search failed: {str(e)}")
-            try:
-                # Fallback to DuckDuckGo
-                return await self._search_with_duckduckgo(query)
-            except Exception as e2:
-                print(f"All search methods failed: {str(e2)}")
-                return await self._enhanced_simulation(query)
+            for next_done in asyncio.as_completed(tasks, timeout=SEARCH_FANOUT_TIMEOUT):
+                try:
+                    result = await next_done
+                except asyncio.TimeoutError:
+                    raise
+                except CircuitOpenError as e:
+                    logger.debug("%s", e)
+                    continue
+                except Exception as e:
+                    logger.warning("Search provider failed: %s", e)
+                    continue
+                
+                if result.results_found:
+                    return result
+                empty_result = empty_result or result
+        except asyncio.TimeoutError:
+            logger.warning("Search providers timed out after %ss", SEARCH_FANOUT_TIMEOUT)
+            for task, breaker in breakers.items():
+                if not task.done():
+                    breaker.record_failure()
+        finally:
+            for task in tasks:
+                task.cancel()
+        
+        if empty_result:
+            return empty_result
+        
+        logger.error("All search methods failed for: %s", query)
+        return await self._enhanced_simulation(query)
     
-    async def _search_with_google(self, query: str) -> Dict[str, Any]:
+    async def _search_with_google(self, query: str) -> SearchResult:
         """
         Search using Google Custom Search API
         """
-        import requests
-        import os
-        
-        api_key = os.getenv("GOOGLE_API_KEY")
-        cse_id = os.getenv("GOOGLE_CSE_ID")
-        
-        if not api_key or not cse_id:
+        if not _GOOGLE_API_KEY or not _GOOGLE_CSE_ID:
             raise Exception("Google API credentials not configured. Need GOOGLE_API_KEY and GOOGLE_CSE_ID")
         
-        url = "https://www.googleapis.com/customsearch/v1"
-        params = {
-            'key': api_key,
-            'cx': cse_id,
-            'q': query,
-            'num': 5,  # Number of results to return
-            'safe': 'medium',  # Safe search
-            'dateRestrict': 'w1'  # Results from past week for trending content
-        }
-        
-        print(f"Making Google Custom Search API request for: {query}")
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
+        params = {**_GOOGLE_BASE_PARAMS, 'q': query}
         
-        data = response.json()
+        logger.debug("Making Google Custom Search API request for: %s", query)
+        data = await get_json(GOOGLE_SEARCH_URL, params=params, cache_if=google_results)
         
-        headlines = []
-        sources = []
-        snippets = []
-        
-        if 'items' in data:
-            for item in data['items']:
-                title = item.get('title', '')
-                link = item.get('link', '')
-                snippet = item.get('snippet', '')
-                
-                headlines.append(title)
-                sources.append(link)
-                snippets.append(snippet)
+        items = google_results(data)
+        snippets = tuple(item.get('snippet', '') for item in items)
         
         # Calculate search statistics
         total_results = data.get('searchInformation', {}).get('totalResults', 0)
         search_time = data.get('searchInformation', {}).get('searchTime', 0)
         
-        return {
-            "query": query,
-            "results_found": len(headlines) > 0,
-            "headlines": headlines,
-            "sources": sources,
-            "snippets": snippets,
-            "content_summary": " ".join(snippets[:3]) if snippets else f"Google search results for {query}",
-            "total_results": int(total_results) if total_results else 0,
-            "search_time": float(search_time) if search_time else 0,
-            "timestamp": datetime.now().isoformat(),
-            "provider": "Google Custom Search"
-        }
+        return SearchResult(
+            query=query,
+            headlines=tuple(item.get('title', '') for item in items),
+            sources=tuple(item.get('link', '') for item in items),
+            snippets=snippets,
+            summary=" ".join(snippets[:3]) if snippets else f"Google search results for {query}",
+            provider="Google Custom Search",
+            timestamp=_iso_now(),
+            results_found=len(items) > 0,
+            total_results=int(total_results) if total_results else 0,
+            search_time=float(search_time) if search_time else 0.0
+        )
     
-    async def _search_with_newsapi(self, query: str) -> Dict[str, Any]:
+    async def _search_with_newsapi(self, query: str) -> SearchResult:
         """
         Search using NewsAPI (requires API key)
         """
-        import requests
-        import os
-        
-        api_key = os.getenv("NEWS_API_KEY")
-        if not api_key:
+        if not _NEWS_API_KEY:
             raise Exception("NEWS_API_KEY not configured")
         
-        url = "https://newsapi.org/v2/everything"
-        params = {
-            'apiKey': api_key,
-            'q': query,
-            'sortBy': 'relevancy',
-            'pageSize': 5,
-            'language': 'en'
-        }
-        
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
+        params = {**_NEWS_BASE_PARAMS, 'q': query}
         
-        data = response.json()
+        data = await get_json(NEWS_API_URL, params=params, cache_if=lambda data: data.get('articles'))
         
-        headlines = []
-        sources = []
-        snippets = []
+        articles = (data.get('articles') or [])[:5]
+        snippets = tuple(article.get('description', '') for article in articles)
         
-        if 'articles' in data:
-            for article in data['articles'][:5]:
-                headlines.append(article.get('title', ''))
-                sources.append(article.get('url', ''))
-                snippets.append(article.get('description', ''))
-        
-        return {
-            "query": query,
-            "results_found": len(headlines) > 0,
-            "headlines": headlines,
-            "sources": sources,
-            "snippets": snippets,
-            "content_summary": " ".join(snippets[:3]) if snippets else f"News coverage about {query}",
-            "timestamp": datetime.now().isoformat(),
-            "provider": "NewsAPI"
-        }
+        return SearchResult(
+            query=query,
+            headlines=tuple(article.get('title', '') for article in articles),
+            sources=tuple(article.get('url', '') for article in articles),
+            snippets=snippets,
+            summary=" ".join(snippet or "" for snippet in snippets[:3]) if snippets else f"News coverage about {query}",
+            provider="NewsAPI",
+            timestamp=_iso_now(),
+            results_found=len(articles) > 0
+        )
     
-    async def _search_with_duckduckgo(self, query: str) -> Dict[str, Any]:
+    async def _search_with_duckduckgo(self, query: str) -> SearchResult:
         """
         Search using DuckDuckGo (no API key required)
         This is a simplified implementation - for production use proper DuckDuckGo API
         """
-        import requests
         
         # DuckDuckGo Instant Answer API (limited but free)
         url = "https://api.duckduckgo.com/"
@@ -246,96 +405,86 @@ class WebSearchClient:
             'skip_disambig': '1'
         }
         
-        response = requests.get(url, params=params, timeout=10)
-        response.raise_for_status()
+        data = await get_json(url, params=params, cache_if=lambda data: data.get('RelatedTopics') or data.get('Abstract'))
         
-        data = response.json()
-        
-        headlines = []
-        sources = []
+        related_topics = (data.get('RelatedTopics') or [])[:3]
+        headlines = tuple(topic['Text'] for topic in related_topics if 'Text' in topic)
         abstract = data.get('Abstract', '')
         
-        # Extract related topics
-        if 'RelatedTopics' in data:
-            for topic in data['RelatedTopics'][:3]:
-                if 'Text' in topic:
-                    headlines.append(topic['Text'])
-                if 'FirstURL' in topic:
-                    sources.append(topic['FirstURL'])
-        
-        return {
-            "query": query,
-            "results_found": len(headlines) > 0 or bool(abstract),
-            "headlines": headlines,
-            "sources": sources,
-            "content_summary": abstract or f"Information about {query}",
-            "timestamp": datetime.now().isoformat(),
-            "provider": "DuckDuckGo"
-        }
+        return SearchResult(
+            query=query,
+            headlines=headlines,
+            sources=tuple(topic['FirstURL'] for topic in related_topics if 'FirstURL' in topic),
+            snippets=(),
+            summary=abstract or f"Information about {query}",
+            provider="DuckDuckGo",
+            timestamp=_iso_now(),
+            results_found=len(headlines) > 0 or bool(abstract)
+        )
     
-    async def _enhanced_simulation(self, query: str) -> Dict[str, Any]:
+    async def _enhanced_simulation(self, query: str) -> SearchResult:
         """
         Enhanced simulation with more realistic content
         """
-        import random
-        
         topic_words = query.split()
         main_topic = topic_words[0] if topic_words else "topic"
         
-        realistic_headlines = [
-            f"{main_topic.title()} Makes Headlines in Major Development",
-            f"Breaking: Latest Updates on {main_topic.title()} Situation", 
-            f"Analysis: Why {main_topic.title()} is Trending Across Platforms",
-            f"{main_topic.title()}: What You Need to Know",
-            f"Expert Opinion: {main_topic.title()} Impact and Analysis"
-        ]
+        topic_title = main_topic.title()
+        query_lower = query.lower()
+        realistic_sources = (
+            SIMULATION_SOURCES_SPORTS if any(word in query_lower for word in SIMULATION_SPORTS_WORDS)
+            else SIMULATION_SOURCES_GENERAL
+        )
         
-        realistic_sources = [
-            "cnn.com", "bbc.com", "reuters.com", "ap.org", "nytimes.com",
-            "espn.com" if any(word in query.lower() for word in ['sport', 'game', 'player', 'team']) else "techcrunch.com",
-            "reddit.com", "twitter.com"
-        ]
-        
-        return {
-            "query": query,
-            "results_found": True,
-            "headlines": random.sample(realistic_headlines, min(len(realistic_headlines), 3)),
-            "sources": random.sample(realistic_sources, min(len(realistic_sources), 3)),
-            "content_summary": f"Multiple sources reporting on {main_topic} with significant coverage across news and social media platforms.",
-            "timestamp": datetime.now().isoformat(),
-            "provider": "Enhanced Simulation"
-        }
+        return SearchResult(
+            query=query,
+            headlines=tuple(template.format(topic_title) for template in random.sample(SIMULATION_HEADLINES, 3)),
+            sources=tuple(random.sample(realistic_sources, 3)),
+            snippets=(),
+            summary=f"Multiple sources reporting on {main_topic} with significant coverage across news and social media platforms.",
+            provider="Enhanced Simulation",
+            timestamp=_iso_now(),
+            results_found=True,
+            simulated=True
+        )
     
-    async def _simulate_web_search(self, query: str) -> Dict[str, Any]:
+    async def _simulate_web_search(self, query: str) -> SearchResult:
         """
         Fallback simulation method
         """
-        return {
-            "query": query,
-            "results_found": True,
-            "headlines": [
-                f"Breaking news about {query.split()[0]}",
-                f"Latest updates on {query.split()[0]}",
-                f"Analysis: {query.split()[0]} trending"
-            ],
-            "sources": ["fallback_source.com", "news_site.com", "social_media.com"],
-            "timestamp": datetime.now().isoformat(),
-            "note": "FALLBACK SIMULATION"
-        }
+        main_topic = query.split()[0]
+        return SearchResult(
+            query=query,
+            headlines=(
+                f"Breaking news about {main_topic}",
+                f"Latest updates on {main_topic}",
+                f"Analysis: {main_topic} trending"
+            ),
+            sources=("fallback_source.com", "news_site.com", "social_media.com"),
+            snippets=(),
+            summary="",
+            provider="FALLBACK SIMULATION",
+            timestamp=_iso_now(),
+            results_found=True,
+            simulated=True
+        )
     
-    async def _extract_content_summary(self, search_results: Dict[str, Any], topic_name: str) -> str:
+    async def _extract_content_summary(self, search_results: SearchResult, topic_name: str) -> Optional[str]:
         """
         Use LLM to extract and summarize content from search results
+        
+        Returns None when no summary could be generated, so callers can tell failure from content
         """
         if not self.client.is_available():
-            return f"Content analysis unavailable - OpenAI not configured. Topic: {topic_name}"
+            logger.warning("Content analysis unavailable - OpenAI not configured. Topic: %s", topic_name)
+            return None
         
         try:
             # Create prompt for content summarization
             prompt = f"""
             Analyze these web search results for the trending topic "{topic_name}":
             
-            Search Results: {search_results}
+            Search Results: {_compact_search_results(search_results)}
             
             Provide a concise summary (2-3 sentences) of:
             1. What specific event or content is making this topic trend
@@ -346,33 +495,26 @@ class WebSearchClient:
             """
             
             summary = await self.client.generate_completion(prompt)
-            return summary.strip()
+            return summary.strip() or None
             
         except Exception as e:
-            print(f"ERROR in content summarization: {str(e)}")
-            return f"Unable to summarize content for {topic_name} - {str(e)}"
+            logger.error("Error in content summarization for %s: %s", topic_name, e)
+            return None
     
-    def _identify_themes(self, search_results: Dict[str, Any]) -> List[str]:
+    def _identify_themes(self, search_results: SearchResult) -> List[str]:
         """
         Extract key themes from search results
         """
         try:
-            # Simple theme extraction based on headlines and content
-            themes = []
-            
-            # Extract themes from headlines if available
-            if "headlines" in search_results:
-                for headline in search_results["headlines"]:
-                    # Simple keyword extraction
-                    words = re.findall(r'\b\w+\b', headline.lower())
-                    themes.extend([w for w in words if len(w) > 4])
+            # Count longer words across all headlines in one pass and keep the most frequent
+            text = " ".join(search_results.headlines).lower()
+            counts = Counter(word for word in THEME_WORD_RE.findall(text) if word not in THEME_STOP_WORDS)
             
-            # Return unique themes, limited to top 5
-            unique_themes = list(set(themes))[:5]
-            return unique_themes if unique_themes else ["trending", "news", "popular"]
+            themes = [word for word, _ in counts.most_common(5)]
+            return themes if themes else ["trending", "news", "popular"]
             
         except Exception as e:
-            print(f"ERROR in theme identification: {str(e)}")
+            logger.error("Error in theme identification: %s", e)
             return ["trending", "news"]
 
 
@@ -2,7 +2,7 @@
 Data models for marketing campaign system
 """
 from typing import Dict, List, Any, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
 
@@ -35,7 +35,7 @@ class ContentType(Enum):
     BLOG_POST = "blog_post"
 
 
-@dataclass
+@dataclass(slots=True)
 class BrandProfile:
     brand_name: str
     industry: str
@@ -48,7 +48,7 @@ class BrandProfile:
     logo_url: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class AudienceProfile:
     demographics: Dict[str, Any]
     interests: List[str]
@@ -60,7 +60,7 @@ class AudienceProfile:
     income_level: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class CampaignBrief:
     campaign_id: str
     topic_id: int
@@ -79,7 +79,7 @@ class CampaignBrief:
     duration_days: Optional[int] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class SocialPost:
     platform: Platform
     content_type: ContentType
@@ -94,7 +94,7 @@ class SocialPost:
     engagement_prediction: Optional[float] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class EmailContent:
     email_number: int
     email_type: str
@@ -107,7 +107,7 @@ class EmailContent:
     expected_click_rate: Optional[float] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class CampaignContent:
     campaign_id: str
     social_posts: List[SocialPost]
@@ -117,9 +117,11 @@ class CampaignContent:
     content_calendar: Dict[str, Any]
     performance_predictions: Dict[str, Any]
     generated_at: datetime
+    # Error per channel (platform value) whose content could not be generated
+    channel_errors: Dict[str, str] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class CampaignRequest:
     topic_id: int
     brand_profile: BrandProfile
@@ -131,7 +133,7 @@ class CampaignRequest:
     urgent: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class ContentGenerationRequest:
     campaign_brief: CampaignBrief
     content_types: List[ContentType]
@@ -0,0 +1,21 @@
+"""
+Instructions and helpers shared by the prompt modules
+"""
+import hashlib
+
+# Output instruction used by every prompt that expects a JSON response
+JSON_RESPONSE_INSTRUCTION = "Always respond in valid JSON format."
+
+
+def prompt_fingerprint(*parts) -> str:
+    """
+    Short stable hash identifying a prompt, for caching LLM responses by exact request
+    
+    Args:
+        parts: The messages and any request options that affect the response
+        
+    Returns:
+        32-character hex digest; equal parts always give the same fingerprint
+    """
+    payload = "\x00".join(str(part) for part in parts)
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
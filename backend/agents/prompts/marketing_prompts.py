@@ -1,35 +1,35 @@
 """
 Marketing campaign generation prompts
+
+System messages hold the static parts of each request - the brand/audience block, the
+role instructions and the expected JSON structure - ahead of the per-call data in the user
+message, so repeated calls share the longest possible prefix for OpenAI's prompt caching.
 """
+from types import MappingProxyType
 from typing import Dict, Any, Tuple
 
+import orjson
 
-def get_campaign_strategy_prompt(trending_analysis: Dict[str, Any], brand_profile: Dict[str, Any], audience_profile: Dict[str, Any]) -> Tuple[str, str]:
-    """Generate system and user prompts for campaign strategy creation"""
-    
-    system_message = """You are a digital marketing strategist specializing in trend-based campaigns and multi-channel marketing.
+from .common import JSON_RESPONSE_INSTRUCTION
 
-Your expertise includes:
-- Converting trending topics into authentic brand campaigns
-- Multi-channel campaign development and optimization
-- Audience-specific messaging and content strategies
-- Performance prediction and success metrics definition
-- Brand-trend alignment without compromising authenticity
-- Content calendar planning and timing optimization
 
-Always respond in valid JSON format. Create campaigns that authentically connect trending topics to brand objectives while respecting brand values and audience preferences."""
+def _json_block(value: Any) -> str:
+    """
+    Render structured data for a prompt as canonical JSON (sorted keys), so the same
+    content always produces the same bytes regardless of dict insertion order
+    """
+    return orjson.dumps(value, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS, default=str).decode()
 
-    user_message = f"""Create a comprehensive marketing campaign strategy for this trending topic:
 
-TRENDING ANALYSIS:
-Topic: {trending_analysis.get('topic_info', {}).get('topic_name', 'Unknown')}
-Trending Reason: {trending_analysis.get('trending_analysis', {}).get('trending_reason', {})}
-Content Analysis: {trending_analysis.get('trending_analysis', {}).get('content_analysis', {})}
-Business Context: {trending_analysis.get('trending_analysis', {}).get('business_context', {})}
-Predictions: {trending_analysis.get('trending_analysis', {}).get('prediction', {})}
-Geographic Focus: {trending_analysis.get('trending_analysis', {}).get('trend_patterns', {}).get('geographic_insight', 'Global')}
-
-BRAND PROFILE:
+def get_brand_context(brand_profile: Dict[str, Any], audience_profile: Dict[str, Any]) -> str:
+    """
+    Render the brand and audience block that opens every campaign system message
+    
+    The block only depends on the tenant's profiles, so it is byte-identical across the
+    strategy, social and email calls of a campaign and keeps a stable prompt prefix for
+    OpenAI's automatic prompt caching. Per-call instructions and trending data follow it.
+    """
+    return f"""BRAND PROFILE:
 Brand: {brand_profile.get('brand_name', 'Unknown')}
 Industry: {brand_profile.get('industry', 'Unknown')}
 Business Vertical: {brand_profile.get('business_vertical', 'Unknown')}
@@ -39,124 +39,146 @@ Target Markets: {brand_profile.get('target_markets', [])}
 Prohibited Topics: {brand_profile.get('prohibited_topics', [])}
 
 AUDIENCE PROFILE:
-Demographics: {audience_profile.get('demographics', {})}
+Demographics: {_json_block(audience_profile.get('demographics', {}))}
 Interests: {audience_profile.get('interests', [])}
 Pain Points: {audience_profile.get('pain_points', [])}
 Preferred Platforms: {audience_profile.get('preferred_platforms', [])}
 Content Preferences: {audience_profile.get('content_preferences', [])}
-Geographic Focus: {audience_profile.get('geographic_focus', [])}
+Geographic Focus: {audience_profile.get('geographic_focus', [])}"""
+
 
-Generate a comprehensive campaign strategy in this exact JSON structure:
+def _campaign_brand_context(campaign_brief: Dict[str, Any]) -> str:
+    """Brand and audience block for a campaign brief, using the copy pre-rendered by the generator if present"""
+    return campaign_brief.get('brand_context') or get_brand_context(
+        campaign_brief.get('brand_profile', {}), campaign_brief.get('audience_profile', {})
+    )
 
-{{
-    "campaign_concept": {{
+
+CAMPAIGN_STRATEGY_SYSTEM_MESSAGE = """You are a digital marketing strategist specializing in trend-based campaigns and multi-channel marketing.
+
+Your expertise includes:
+- Converting trending topics into authentic brand campaigns
+- Multi-channel campaign development and optimization
+- Audience-specific messaging and content strategies
+- Performance prediction and success metrics definition
+- Brand-trend alignment without compromising authenticity
+- Content calendar planning and timing optimization
+
+""" + JSON_RESPONSE_INSTRUCTION + """ Create campaigns that authentically connect trending topics to brand objectives while respecting brand values and audience preferences.
+
+Provide the campaign strategy in this exact JSON structure:
+
+{
+    "campaign_concept": {
         "theme": "Central campaign theme connecting trend to brand",
         "key_message": "Primary message across all channels",
         "brand_angle": "How this trend relates specifically to our brand",
         "call_to_action": "Primary CTA across campaign",
         "campaign_duration": "recommended campaign duration",
         "urgency_level": "high/medium/low based on trend momentum"
-    }},
-    "channel_strategy": {{
-        "social_media": {{
+    },
+    "channel_strategy": {
+        "social_media": {
             "recommended_platforms": ["list of platforms"],
             "content_types": ["post types per platform"],
             "posting_frequency": "posts per day/week",
             "optimal_timing": "best posting times",
             "engagement_tactics": ["specific engagement strategies"]
-        }},
-        "email": {{
+        },
+        "email": {
             "sequence_type": "nurture/promotional/educational",
             "email_count": "number of emails in sequence",
             "send_schedule": "timing between emails",
             "segmentation": "audience segmentation strategy",
             "personalization": "personalization approach"
-        }},
-        "content_marketing": {{
+        },
+        "content_marketing": {
             "blog_topics": ["suggested blog post topics"],
             "video_concepts": ["video content ideas"],
             "infographic_ideas": ["visual content suggestions"]
-        }}
-    }},
-    "content_pillars": {{
+        }
+    },
+    "content_pillars": {
         "educational": "educational content angle and topics",
         "promotional": "promotional content approach", 
         "engagement": "engagement-focused content strategy",
         "social_proof": "social proof and credibility content",
         "trending_participation": "how to participate in the trend authentically"
-    }},
-    "success_metrics": {{
+    },
+    "success_metrics": {
         "awareness_kpis": ["brand awareness metrics to track"],
         "engagement_kpis": ["engagement metrics to measure"],
         "conversion_kpis": ["conversion and lead metrics"],
         "brand_sentiment": "brand sentiment tracking approach"
-    }},
-    "risk_assessment": {{
+    },
+    "risk_assessment": {
         "brand_safety_score": "1-10 score for brand safety",
         "potential_risks": ["list of potential risks"],
         "mitigation_strategies": ["risk mitigation approaches"],
         "monitoring_requirements": ["what to monitor during campaign"]
-    }},
-    "budget_allocation": {{
+    },
+    "budget_allocation": {
         "content_creation": "% for content creation",
         "paid_promotion": "% for paid advertising",
         "influencer_collaboration": "% for influencer partnerships",
         "tools_and_analytics": "% for tools and measurement"
-    }}
-}}"""
+    }
+}"""
 
-    return system_message, user_message
 
+CAMPAIGN_STRATEGY_USER_TEMPLATE = """Create a comprehensive marketing campaign strategy for this trending topic, for the brand and audience described above:
 
-def get_social_media_content_prompt(campaign_brief: Dict[str, Any], platform: str, post_count: int) -> Tuple[str, str]:
-    """Generate system and user prompts for social media content creation"""
-    
-    platform_contexts = {
-        "linkedin": "professional networking and B2B engagement with thought leadership focus",
-        "twitter": "real-time conversations and viral engagement with concise messaging",
-        "instagram": "visual storytelling and lifestyle content with strong aesthetic appeal",
-        "tiktok": "entertainment and trend participation with creative video concepts",
-        "facebook": "community building and longer-form content with diverse demographics"
+TRENDING ANALYSIS:
+Topic: {topic_name}
+Trending Reason: {trending_reason}
+Content Analysis: {content_analysis}
+Business Context: {business_context}
+Predictions: {prediction}
+Geographic Focus: {geographic_insight}"""
+
+
+CAMPAIGN_CONCEPT_TEMPLATE = """Theme: {theme}
+Key Message: {key_message}
+Brand Angle: {brand_angle}
+Call to Action: {call_to_action}"""
+
+
+def _concept_fields(concept: Dict[str, Any]) -> Dict[str, str]:
+    """Template values for the CAMPAIGN CONCEPT block shared by the channel prompts"""
+    return {
+        'campaign_concept': CAMPAIGN_CONCEPT_TEMPLATE.format_map({
+            'theme': concept.get('theme', 'Unknown'),
+            'key_message': concept.get('key_message', 'Unknown'),
+            'brand_angle': concept.get('brand_angle', 'Unknown'),
+            'call_to_action': concept.get('call_to_action', 'Unknown')
+        })
     }
-    
-    system_message = f"""You are a {platform.title()} content strategist expert in creating viral, engaging content that drives business results.
-
-Your expertise includes:
-- Platform-specific content optimization and best practices
-- {platform_contexts.get(platform, 'social media content creation')}
-- Hashtag research and trending topic integration
-- Engagement-driven copywriting and call-to-action optimization
-- Visual content suggestions and creative direction
-- Community management and audience interaction strategies
 
-Create content that feels native to {platform.title()} while serving brand objectives. Always respond in valid JSON format."""
 
-    user_message = f"""Create {post_count} {platform.title()} posts for this campaign:
+def get_campaign_strategy_prompt(trending_analysis: Dict[str, Any], brand_profile: Dict[str, Any], audience_profile: Dict[str, Any]) -> Tuple[str, str]:
+    """Generate system and user prompts for campaign strategy creation"""
+    
+    system_message = get_brand_context(brand_profile, audience_profile) + "\n\n" + CAMPAIGN_STRATEGY_SYSTEM_MESSAGE
 
-CAMPAIGN CONCEPT:
-Theme: {campaign_brief.get('campaign_concept', {}).get('theme', 'Unknown')}
-Key Message: {campaign_brief.get('campaign_concept', {}).get('key_message', 'Unknown')}
-Brand Angle: {campaign_brief.get('campaign_concept', {}).get('brand_angle', 'Unknown')}
-Call to Action: {campaign_brief.get('campaign_concept', {}).get('call_to_action', 'Unknown')}
+    analysis = trending_analysis.get('trending_analysis', {})
 
-BRAND PROFILE:
-Brand: {campaign_brief.get('brand_profile', {}).get('brand_name', 'Unknown')}
-Voice: {campaign_brief.get('brand_profile', {}).get('brand_voice', 'professional')}
-Industry: {campaign_brief.get('brand_profile', {}).get('industry', 'Unknown')}
-Core Values: {campaign_brief.get('brand_profile', {}).get('core_values', [])}
+    user_message = CAMPAIGN_STRATEGY_USER_TEMPLATE.format_map({
+        'topic_name': trending_analysis.get('topic_info', {}).get('topic_name', 'Unknown'),
+        'trending_reason': _json_block(analysis.get('trending_reason', {})),
+        'content_analysis': _json_block(analysis.get('content_analysis', {})),
+        'business_context': _json_block(analysis.get('business_context', {})),
+        'prediction': _json_block(analysis.get('prediction', {})),
+        'geographic_insight': analysis.get('trend_patterns', {}).get('geographic_insight', 'Global')
+    })
 
-TRENDING CONTEXT:
-Topic: {campaign_brief.get('topic_name', 'Unknown')}
-Trending Analysis: {campaign_brief.get('trending_analysis', {})}
+    return system_message, user_message
 
-CONTENT PILLARS:
-{campaign_brief.get('content_pillars', {})}
 
-Generate {platform.title()} content in this exact JSON structure:
+SOCIAL_MEDIA_CONTENT_RESPONSE_FORMAT = """Provide the posts in this exact JSON structure:
 
-{{
+{
     "posts": [
-        {{
+        {
             "post_number": 1,
             "content_type": "single_post/carousel/thread/video/story",
             "content_pillar": "educational/promotional/engagement/social_proof",
@@ -169,22 +191,88 @@ Generate {platform.title()} content in this exact JSON structure:
             "optimal_timing": "best time to post",
             "engagement_prediction": "predicted engagement level",
             "performance_tips": ["tips to maximize performance"]
-        }}
+        }
     ],
-    "content_calendar": {{
+    "content_calendar": {
         "posting_schedule": "recommended posting timeline",
         "content_mix": "balance of content types",
         "engagement_strategy": "how to maximize engagement"
-    }}
-}}"""
+    }
+}"""
 
-    return system_message, user_message
 
+# Read-only so the per-platform system messages built from it below stay in sync
+SOCIAL_MEDIA_PLATFORM_CONTEXTS = MappingProxyType({
+    "linkedin": "professional networking and B2B engagement with thought leadership focus",
+    "twitter": "real-time conversations and viral engagement with concise messaging",
+    "instagram": "visual storytelling and lifestyle content with strong aesthetic appeal",
+    "tiktok": "entertainment and trend participation with creative video concepts",
+    "facebook": "community building and longer-form content with diverse demographics"
+})
 
-def get_email_campaign_prompt(campaign_brief: Dict[str, Any], email_count: int) -> Tuple[str, str]:
-    """Generate system and user prompts for email campaign creation"""
+
+def _social_media_system_message(platform: str) -> str:
+    """Role instructions and response format for one social platform"""
+    platform_title = platform.title()
+    return f"""You are a {platform_title} content strategist expert in creating viral, engaging content that drives business results.
+
+Your expertise includes:
+- Platform-specific content optimization and best practices
+- {SOCIAL_MEDIA_PLATFORM_CONTEXTS.get(platform, 'social media content creation')}
+- Hashtag research and trending topic integration
+- Engagement-driven copywriting and call-to-action optimization
+- Visual content suggestions and creative direction
+- Community management and audience interaction strategies
+
+Create content that feels native to {platform_title} while serving brand objectives. {JSON_RESPONSE_INSTRUCTION}
+
+""" + SOCIAL_MEDIA_CONTENT_RESPONSE_FORMAT
+
+
+SOCIAL_MEDIA_USER_TEMPLATE = """Create {post_count} {platform_title} posts for this campaign:
+
+CAMPAIGN CONCEPT:
+{campaign_concept}
+
+TRENDING CONTEXT:
+Topic: {topic_name}
+Trending Analysis: {trending_analysis}
+
+CONTENT PILLARS:
+{content_pillars}"""
+
+
+# Built once at import for every known platform; other platforms are rendered per call
+SOCIAL_MEDIA_PLATFORM_TITLES = MappingProxyType({
+    platform: platform.title() for platform in SOCIAL_MEDIA_PLATFORM_CONTEXTS
+})
+SOCIAL_MEDIA_SYSTEM_MESSAGES = MappingProxyType({
+    platform: _social_media_system_message(platform) for platform in SOCIAL_MEDIA_PLATFORM_CONTEXTS
+})
+
+
+def get_social_media_content_prompt(campaign_brief: Dict[str, Any], platform: str, post_count: int) -> Tuple[str, str]:
+    """Generate system and user prompts for social media content creation"""
+    
+    system_message = _campaign_brand_context(campaign_brief) + "\n\n" + (
+        SOCIAL_MEDIA_SYSTEM_MESSAGES.get(platform) or _social_media_system_message(platform)
+    )
     
-    system_message = """You are an email marketing specialist expert in creating high-converting email campaigns that leverage trending topics.
+    concept = campaign_brief.get('campaign_concept') or {}
+
+    user_message = SOCIAL_MEDIA_USER_TEMPLATE.format_map({
+        'post_count': post_count,
+        'platform_title': SOCIAL_MEDIA_PLATFORM_TITLES.get(platform) or platform.title(),
+        **_concept_fields(concept),
+        'topic_name': campaign_brief.get('topic_name', 'Unknown'),
+        'trending_analysis': campaign_brief.get('trending_analysis_json') or _json_block(campaign_brief.get('trending_analysis', {})),
+        'content_pillars': _json_block(campaign_brief.get('content_pillars', {}))
+    })
+
+    return system_message, user_message
+
+
+EMAIL_CAMPAIGN_SYSTEM_MESSAGE = """You are an email marketing specialist expert in creating high-converting email campaigns that leverage trending topics.
 
 Your expertise includes:
 - Email sequence design and customer journey mapping
@@ -195,45 +283,19 @@ Your expertise includes:
 - Deliverability best practices and list management
 - Conversion rate optimization for email campaigns
 
-Create email campaigns that authentically incorporate trending topics while driving business objectives. Always respond in valid JSON format."""
-
-    user_message = f"""Create a {email_count}-email campaign sequence for this trending topic campaign:
-
-CAMPAIGN CONCEPT:
-Theme: {campaign_brief.get('campaign_concept', {}).get('theme', 'Unknown')}
-Key Message: {campaign_brief.get('campaign_concept', {}).get('key_message', 'Unknown')}
-Brand Angle: {campaign_brief.get('campaign_concept', {}).get('brand_angle', 'Unknown')}
-Call to Action: {campaign_brief.get('campaign_concept', {}).get('call_to_action', 'Unknown')}
+Create email campaigns that authentically incorporate trending topics while driving business objectives. """ + JSON_RESPONSE_INSTRUCTION + """
 
-BRAND PROFILE:
-Brand: {campaign_brief.get('brand_profile', {}).get('brand_name', 'Unknown')}
-Voice: {campaign_brief.get('brand_profile', {}).get('brand_voice', 'professional')}
-Industry: {campaign_brief.get('brand_profile', {}).get('industry', 'Unknown')}
+Provide the email sequence in this exact JSON structure:
 
-AUDIENCE PROFILE:
-Demographics: {campaign_brief.get('audience_profile', {}).get('demographics', {})}
-Pain Points: {campaign_brief.get('audience_profile', {}).get('pain_points', [])}
-Interests: {campaign_brief.get('audience_profile', {}).get('interests', [])}
-
-TRENDING CONTEXT:
-Topic: {campaign_brief.get('topic_name', 'Unknown')}
-Trending Reason: {campaign_brief.get('trending_analysis', {}).get('trending_analysis', {}).get('trending_reason', {})}
-
-EMAIL STRATEGY:
-Type: {campaign_brief.get('channel_strategy', {}).get('email', {}).get('sequence_type', 'nurture')}
-Personalization: {campaign_brief.get('channel_strategy', {}).get('email', {}).get('personalization', 'basic')}
-
-Generate the email sequence in this exact JSON structure:
-
-{{
+{
     "email_sequence": [
-        {{
+        {
             "email_number": 1,
             "email_type": "welcome/nurture/promotional/educational",
             "send_timing": "immediate/1 day/3 days after signup",
             "subject_lines": ["3 compelling subject line options"],
             "preview_text": "email preview text that complements subject",
-            "email_structure": {{
+            "email_structure": {
                 "preheader": "preview text optimization",
                 "greeting": "personalized greeting",
                 "hook": "trending topic connection and attention grabber",
@@ -244,34 +306,68 @@ Generate the email sequence in this exact JSON structure:
                 "secondary_cta": "optional secondary action",
                 "closing": "email sign-off and signature",
                 "ps": "powerful postscript message"
-            }},
-            "personalization_tokens": ["{{first_name}}", "{{company}}", "{{interest}}"],
+            },
+            "personalization_tokens": ["{first_name}", "{company}", "{interest}"],
             "mobile_optimization": "mobile-specific formatting notes",
-            "a_b_test_variants": {{
+            "a_b_test_variants": {
                 "subject_line_test": "what to test in subject lines",
                 "content_test": "what to test in email content",
                 "cta_test": "what to test in call-to-action"
-            }},
-            "expected_metrics": {{
+            },
+            "expected_metrics": {
                 "open_rate": "predicted open rate %",
                 "click_rate": "predicted click rate %",
                 "conversion_rate": "predicted conversion rate %"
-            }}
-        }}
+            }
+        }
     ],
-    "sequence_strategy": {{
+    "sequence_strategy": {
         "email_flow": "overall sequence narrative and progression",
         "timing_optimization": "optimal send times and frequency",
         "segmentation": "audience segmentation recommendations",
         "automation_triggers": "behavioral triggers for email sends",
         "follow_up_strategy": "post-sequence engagement plan"
-    }},
-    "performance_optimization": {{
+    },
+    "performance_optimization": {
         "list_building": "strategies to grow email list using this trend",
         "deliverability": "tips to ensure inbox placement",
         "engagement_boosters": "tactics to increase engagement",
         "conversion_optimization": "strategies to maximize conversions"
-    }}
-}}"""
+    }
+}"""
+
+
+EMAIL_CAMPAIGN_USER_TEMPLATE = """Create a {email_count}-email campaign sequence for this trending topic campaign:
+
+CAMPAIGN CONCEPT:
+{campaign_concept}
+
+TRENDING CONTEXT:
+Topic: {topic_name}
+Trending Reason: {trending_reason}
+
+EMAIL STRATEGY:
+Type: {sequence_type}
+Personalization: {personalization}"""
+
+
+def get_email_campaign_prompt(campaign_brief: Dict[str, Any], email_count: int) -> Tuple[str, str]:
+    """Generate system and user prompts for email campaign creation"""
+    
+    system_message = _campaign_brand_context(campaign_brief) + "\n\n" + EMAIL_CAMPAIGN_SYSTEM_MESSAGE
+    
+    # Resolve the nested sections once rather than per field
+    concept = campaign_brief.get('campaign_concept') or {}
+    trending_reason = ((campaign_brief.get('trending_analysis') or {}).get('trending_analysis') or {}).get('trending_reason', {})
+    email_strategy = (campaign_brief.get('channel_strategy') or {}).get('email') or {}
+
+    user_message = EMAIL_CAMPAIGN_USER_TEMPLATE.format_map({
+        'email_count': email_count,
+        **_concept_fields(concept),
+        'topic_name': campaign_brief.get('topic_name', 'Unknown'),
+        'trending_reason': _json_block(trending_reason),
+        'sequence_type': email_strategy.get('sequence_type', 'nurture'),
+        'personalization': email_strategy.get('personalization', 'basic')
+    })
 
     return system_message, user_message
\ No newline at end of file
@@ -2,14 +2,8 @@
 Schema information prompts and templates
 """
 
-def get_schema_info() -> str:
-    """
-    Get the database schema information for trending data
-    
-    Returns:
-        Formatted schema information for use in prompts
-    """
-    schema_info = """Available tables and their purpose:
+# Static description of the trending tables, shared by every SQL generation prompt
+SCHEMA_INFO = """Available tables and their purpose:
 
 Table: trend_events (DENORMALIZED STRUCTURE)
 Purpose: Time-series events with denormalized topic information and geographic hierarchy
@@ -42,5 +36,13 @@ Common query patterns:
 - Recent trends: Use timestamp >= now() - INTERVAL X HOUR/DAY/MINUTE
 - Multi-country analysis: Use country_code IN ('US', 'CA') for regional comparisons
 """
+
+
+def get_schema_info() -> str:
+    """
+    Get the database schema information for trending data
     
-    return schema_info
\ No newline at end of file
+    Returns:
+        Formatted schema information for use in prompts
+    """
+    return SCHEMA_INFO
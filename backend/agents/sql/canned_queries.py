@@ -0,0 +1,94 @@
+"""
+Deterministic SQL for the canned queries sent by the trending page
+
+The trending page builds its natural language query from a fixed set of filters
+("Show me trending topics in the last 24 hour in Canada, in sports category"), so those
+queries can be translated directly instead of going through OpenAI. Anything that
+doesn't match exactly is left to the SQL agent.
+"""
+import re
+from typing import Optional
+
+# Filter labels used by the trending page, mapped to their column values
+COUNTRY_CODES = {
+    "united states": "US",
+    "canada": "CA",
+    "united kingdom": "GB",
+    "germany": "DE",
+    "france": "FR",
+    "japan": "JP",
+    "australia": "AU"
+}
+CATEGORIES = ("technology", "sports", "entertainment", "politics", "business", "health", "science")
+BUSINESSES = {
+    "technology": "tech",
+    "finance": "finance",
+    "healthcare": "healthcare",
+    "retail": "retail",
+    "media": "media",
+    "automotive": "automotive",
+    "education": "education"
+}
+
+
+def _alternation(names) -> str:
+    """Regex alternation matching any of the given labels literally"""
+    return "|".join(re.escape(name) for name in names)
+
+
+# Query shape built by the trending page: time window, then optional filters in this order
+TRENDING_QUERY_PATTERN = re.compile(
+    r"show me trending topics in the last (?P<amount>\d+) (?P<unit>minute|hour|day)s?"
+    rf"(?: in (?P<country>{_alternation(COUNTRY_CODES)}))?"
+    rf"(?:,? in (?P<category>{_alternation(CATEGORIES)}) category)?"
+    rf"(?:,? for (?P<business>{_alternation(BUSINESSES)}) business vertical)?",
+    re.IGNORECASE
+)
+
+# Columns every trending row is grouped by; a country filter adds country_code, as the
+# SQL prompt asks of the model, so both paths return the same row shape
+TRENDING_GROUP_COLUMNS = ("topic_id", "topic_name", "category", "business")
+
+TRENDING_SQL_TEMPLATE = """SELECT
+    {select_columns},
+    avg(trend_score) as avg_trend_score,
+    max(trend_score) as peak_trend_score,
+    sum(stat_value) as total_volume,
+    count(*) as event_count
+FROM trend_events
+WHERE {conditions}
+GROUP BY {group_columns}
+ORDER BY avg_trend_score DESC
+LIMIT 50"""
+
+
+def match_canned_query(natural_query: str) -> Optional[str]:
+    """
+    Translate a trending page query to SQL without calling the model
+
+    Args:
+        natural_query: User's natural language query
+
+    Returns:
+        SQL query string, or None if the query isn't one of the canned shapes
+    """
+    match = TRENDING_QUERY_PATTERN.fullmatch(" ".join(natural_query.split()))
+    if not match:
+        return None
+
+    # Every interpolated value is an integer or comes from the fixed tables above
+    conditions = [f"timestamp >= now() - INTERVAL {int(match['amount'])} {match['unit'].upper()}"]
+    columns = TRENDING_GROUP_COLUMNS
+    if match['country']:
+        conditions.append(f"country_code = '{COUNTRY_CODES[match['country'].lower()]}'")
+        columns += ("country_code",)
+    if match['category']:
+        conditions.append(f"category = '{match['category'].lower()}'")
+    if match['business']:
+        conditions.append(f"business = '{BUSINESSES[match['business'].lower()]}'")
+
+    return TRENDING_SQL_TEMPLATE.format_map({
+        'select_columns': ",\n    ".join(columns),
+        'group_columns': ", ".join(columns),
+        'conditions': "\n  AND ".join(conditions)
+    })
@@ -2,11 +2,29 @@
 SQL Generation Agent - Converts natural language to ClickHouse SQL
 """
 import re
+import logging
 from typing import Optional
 
+from ..core.cache import TTLCache
+from ..core.coalesce import coalesce
 from ..integrations.openai_client import openai_client
 from ..prompts.sql_prompts import get_sql_generation_prompt, get_topic_detail_prompt
 from ..prompts.schema_prompts import get_schema_info
+from .canned_queries import match_canned_query
+
+logger = logging.getLogger(__name__)
+
+# Generated SQL only depends on the question and the (static) schema; reuse it for an hour
+SQL_CACHE_TTL = 60 * 60
+SQL_CACHE_SIZE = 512
+
+# Smaller, cheaper model for SQL generation; a single query never needs more than a few hundred tokens
+SQL_MODEL = "gpt-4o-mini"
+SQL_MAX_TOKENS = 400
+
+# Markdown code fences the model sometimes wraps around the SQL
+SQL_FENCE_OPEN = re.compile(r'```sql\n?')
+SQL_FENCE_CLOSE = re.compile(r'\n?```')
 
 
 class SqlAgent:
@@ -16,11 +34,15 @@ class SqlAgent:
     
     def __init__(self):
         self.client = openai_client
+        self.sql_cache = TTLCache(maxsize=SQL_CACHE_SIZE, ttl=SQL_CACHE_TTL)
     
+    @coalesce(key=lambda self, natural_query: (self, " ".join(natural_query.split())))
     async def convert_to_sql(self, natural_query: str) -> str:
         """
         Convert natural language query to ClickHouse SQL
         
+        Concurrent calls for the same question share one conversion.
+        
         Args:
             natural_query: User's natural language query
             
@@ -30,30 +52,40 @@ class SqlAgent:
         Raises:
             Exception: If conversion fails or OpenAI client is not available
         """
+        # Queries from the trending page's filters translate without the model
+        canned_sql = match_canned_query(natural_query)
+        if canned_sql:
+            logger.debug("Matched canned query: %s", natural_query)
+            return canned_sql
+        
+        # Whitespace differences don't change the question; case can (string literals)
+        cache_key = ("query", " ".join(natural_query.split()))
+        cached = self.sql_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            print("Getting schema information...")
             schema_info = get_schema_info()
-            
-            print("Building SQL generation prompt...")
-            prompt = get_sql_generation_prompt(natural_query, schema_info)
-            
-            print(f"Prompt: {prompt}")
-            print("Calling OpenAI API...")
+            system_message, user_message = get_sql_generation_prompt(natural_query, schema_info)
+            logger.debug("SQL generation prompt: %s", user_message)
             
             if not self.client.is_available():
                 raise Exception("OpenAI client not initialized - check API key")
             
             # Generate SQL using OpenAI
-            response = await self.client.generate_completion(prompt)
+            response = await self.client.generate_completion_with_system(
+                system_message, user_message, model=SQL_MODEL, max_tokens=SQL_MAX_TOKENS
+            )
             
             # Clean up the response (remove markdown formatting if present)
             sql = self._clean_sql_response(response)
             
-            print(f"OpenAI returned SQL: {sql}")
+            logger.debug("OpenAI returned SQL: %s", sql)
+            self.sql_cache.set(cache_key, sql)
             return sql
             
         except Exception as e:
-            print(f"ERROR in convert_to_sql: {type(e).__name__}: {str(e)}")
+            logger.error("convert_to_sql failed: %s: %s", type(e).__name__, e)
             raise Exception(f"Error converting to SQL: {type(e).__name__}: {str(e)}")
     
     async def generate_topic_detail_sql(self, topic_id: int, time_range: str = "7d", 
@@ -70,25 +102,30 @@ class SqlAgent:
         Returns:
             Generated SQL query string
         """
+        cache_key = ("topic_detail", topic_id, time_range, stat_type, country)
+        cached = self.sql_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
-            print(f"Generating topic detail SQL for topic_id: {topic_id}")
-            
             schema_info = get_schema_info()
-            prompt = get_topic_detail_prompt(topic_id, time_range, stat_type, country, schema_info)
-            
-            print(f"Generated topic query prompt")
+            system_message, user_message = get_topic_detail_prompt(topic_id, time_range, stat_type, country, schema_info)
+            logger.debug("Topic detail prompt for topic %s: %s", topic_id, user_message)
             
             if not self.client.is_available():
                 raise Exception("OpenAI client not initialized - check API key")
             
-            response = await self.client.generate_completion(prompt)
+            response = await self.client.generate_completion_with_system(
+                system_message, user_message, model=SQL_MODEL, max_tokens=SQL_MAX_TOKENS
+            )
             sql = self._clean_sql_response(response)
             
-            print(f"Generated SQL for topic: {sql}")
+            logger.debug("Generated SQL for topic %s: %s", topic_id, sql)
+            self.sql_cache.set(cache_key, sql)
             return sql
             
         except Exception as e:
-            print(f"ERROR in generate_topic_detail_sql: {type(e).__name__}: {str(e)}")
+            logger.error("generate_topic_detail_sql failed: %s: %s", type(e).__name__, e)
             raise Exception(f"Error generating topic detail SQL: {type(e).__name__}: {str(e)}")
     
     def _clean_sql_response(self, response: str) -> str:
@@ -102,8 +139,8 @@ class SqlAgent:
             Cleaned SQL query
         """
         # Remove markdown code block formatting
-        sql = re.sub(r'```sql\n?', '', response)
-        sql = re.sub(r'\n?```', '', sql)
+        sql = SQL_FENCE_OPEN.sub('', response)
+        sql = SQL_FENCE_CLOSE.sub('', sql)
         
         # Strip whitespace
         sql = sql.strip()
@@ -1,19 +1,97 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Any
-import clickhouse_connect
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, SkipValidation
+from typing import Annotated, Iterator, List, Dict, Any, Literal, Optional, Tuple
+from contextlib import asynccontextmanager
 import os
+import re
+import queue
+import asyncio
+import logging
+from logging.handlers import QueueHandler, QueueListener
 from dotenv import load_dotenv
-import json
+import orjson
 
+load_dotenv()
+
+# Request handlers only enqueue log records; a background thread writes them to stderr
+_log_queue = queue.SimpleQueue()
+_log_output = logging.StreamHandler()
+_log_output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+log_listener = QueueListener(_log_queue, _log_output)
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    # Records are fully formatted by the listener's handler, the queue only carries the message
+    format="%(message)s",
+    handlers=[QueueHandler(_log_queue)]
+)
+log_listener.start()
+
+# Imported after logging is configured: the agents connect to ClickHouse and OpenAI at import
+# and log the outcome, which would otherwise be dropped
+from agents.core.cache import TTLCache
+from agents.core.coalesce import coalesce
 from agents.sql.sql_agent import sql_agent
 from agents.integrations.openai_client import openai_client
+from agents.integrations.clickhouse_client import client
+from agents.integrations.http_client import close_http_client
 from agents.analysis.trending_agent import trending_analysis_agent
 from agents.marketing.campaign_generator import campaign_generator
 from agents.marketing.models import BrandProfile, AudienceProfile, CampaignRequest
 
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+# Extra ClickHouse queries describing trend_events when /api/query returns no rows (development aid)
+DEBUG_EMPTY_RESULTS = os.getenv("DEBUG_EMPTY_RESULTS", "false").lower() == "true"
+
+# Row count (from part metadata, no table scan), time range and sample values of trend_events in one query
+EMPTY_RESULT_DIAGNOSTICS_QUERY = """
+    SELECT
+        (SELECT sum(rows) FROM system.parts WHERE database = currentDatabase() AND table = 'trend_events' AND active) AS total,
+        (SELECT min(timestamp) FROM trend_events) AS min_date,
+        (SELECT max(timestamp) FROM trend_events) AS max_date,
+        (SELECT groupArray(country_code) FROM (SELECT DISTINCT country_code FROM trend_events LIMIT 10)) AS countries,
+        (SELECT groupArray(business) FROM (SELECT DISTINCT business FROM trend_events LIMIT 10)) AS businesses,
+        (SELECT groupArray((topic_name, timestamp, stat_type, country_code, business))
+         FROM (SELECT topic_name, timestamp, stat_type, country_code, business FROM trend_events LIMIT 5)) AS sample
+"""
+
+# /api/query results are reused briefly so repeated dashboard loads skip ClickHouse
+QUERY_RESULT_CACHE_TTL = 60
+QUERY_RESULT_CACHE_SIZE = 256
+query_result_cache = TTLCache(maxsize=QUERY_RESULT_CACHE_SIZE, ttl=QUERY_RESULT_CACHE_TTL)
+
+# Time windows shorter than 5 minutes (or in seconds) are not cached
+SHORT_WINDOW_PATTERN = re.compile(r"INTERVAL\s+(?:[0-4]\s+MINUTE|\d+\s+SECOND)", re.IGNORECASE)
+
+# Health probes can arrive every second per replica; reuse the ClickHouse check briefly
+HEALTH_CHECK_CACHE_TTL = 5
+health_cache = TTLCache(maxsize=1, ttl=HEALTH_CHECK_CACHE_TTL)
+
+# Pooled ClickHouse connections opened at startup, so the first concurrent requests skip the handshake
+CLICKHOUSE_WARM_CONNECTIONS = int(os.getenv("CLICKHOUSE_WARM_CONNECTIONS", "4"))
+
+
+async def _warm_clickhouse_pool():
+    """Open CLICKHOUSE_WARM_CONNECTIONS connections in parallel; each returns to the pool afterwards"""
+    pings = await asyncio.gather(*(asyncio.to_thread(client.ping) for _ in range(CLICKHOUSE_WARM_CONNECTIONS)))
+    logger.info("Warmed %d/%d ClickHouse connections", sum(pings), CLICKHOUSE_WARM_CONNECTIONS)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if client:
+        await _warm_clickhouse_pool()
+    yield
+    # Release pooled outbound connections (search providers) on shutdown
+    await close_http_client()
+    # Flush queued log records
+    log_listener.stop()
+
 
 app = FastAPI(
     title="Analytics Viewer API",
@@ -76,63 +154,50 @@ app = FastAPI(
             "name": "Health & Status",
             "description": "API health checks and system status"
         }
-    ]
+    ],
+    # orjson renders the row and campaign payloads (including datetimes) much faster than json
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
+# Row and campaign payloads repeat the same keys on every row and compress well; level 1
+# gets most of the size reduction at a fraction of the CPU of the default level 9.
+# The NDJSON stream opts out (see stream_query)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=1)
+
+# Origins are checked on every request; explicit methods and headers make the preflight
+# response a fixed set of headers instead of echoing each request's headers back
+CORS_ALLOWED_ORIGINS = frozenset({
+    "http://localhost:3000",
+    "https://analytics-frontend-simple-sqljbnaquq-uc.a.run.app"
+})
+
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=[
-        "http://localhost:3000",
-        "https://analytics-frontend-simple-sqljbnaquq-uc.a.run.app"
-    ],
+    allow_origins=CORS_ALLOWED_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type"],
 )
 
-# OpenAI client is now initialized in agents/integrations/openai_client.py
-
-# ClickHouse connection with detailed debugging
-client = None
-try:
-    print("Attempting ClickHouse connection...")
-    print(f"Host: {os.getenv('CLICKHOUSE_HOST')}")
-    print(f"Port: {os.getenv('CLICKHOUSE_PORT')}")
-    print(f"User: {os.getenv('CLICKHOUSE_USER')}")
-    print(f"Database: {os.getenv('CLICKHOUSE_DATABASE')}")
-    print(f"Secure: {os.getenv('CLICKHOUSE_SECURE')}")
-    
-    client = clickhouse_connect.get_client(
-        host=os.getenv("CLICKHOUSE_HOST", "localhost"),
-        port=int(os.getenv("CLICKHOUSE_PORT", 8123)),
-        username=os.getenv("CLICKHOUSE_USER", "default"),
-        password=os.getenv("CLICKHOUSE_PASSWORD", ""),
-        database=os.getenv("CLICKHOUSE_DATABASE", "default"),
-        secure=os.getenv("CLICKHOUSE_SECURE", "false").lower() == "true"
-    )
-    
-    # Test the connection
-    test_result = client.query("SELECT 1 as test")
-    print(f"ClickHouse connection successful! Test result: {test_result.result_rows}")
-    
-except Exception as e:
-    print(f"ClickHouse connection failed: {type(e).__name__}: {str(e)}")
-    import traceback
-    print(f"Full traceback: {traceback.format_exc()}")
-    client = None
+# OpenAI and ClickHouse clients are initialized in agents/integrations/
 
 class QueryRequest(BaseModel):
     query: str
 
 class QueryResponse(BaseModel):
     sql: str
-    data: List[Dict[str, Any]]
+    # Rows come straight from ClickHouse; validating every cell would cost O(rows x columns)
+    data: Annotated[List[Any], SkipValidation]
     chart_type: str
     title: str
+    # Only set for format=columnar, where data holds one value list per row in this order
+    columns: Optional[List[str]] = None
 
 class TopicDetailResponse(BaseModel):
     topic_info: Dict[str, Any]
-    time_series_data: List[Dict[str, Any]]
+    # ClickHouse rows, like QueryResponse.data
+    time_series_data: Annotated[List[Dict[str, Any]], SkipValidation]
     stats: Dict[str, Any]
 
 class TrendingAnalysisResponse(BaseModel):
@@ -183,6 +248,14 @@ class CampaignGenerationRequest(BaseModel):
     duration_days: int = 7
     urgent: bool = False
 
+class CampaignJobResponse(BaseModel):
+    job_id: str
+    status: str  # "queued", "running", "completed", "failed"
+    topic_id: int
+    submitted_at: str
+    campaign: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
 class CampaignResponse(BaseModel):
     campaign_id: str
     campaign_brief: Dict[str, Any]
@@ -192,6 +265,48 @@ class CampaignResponse(BaseModel):
     budget_breakdown: Dict[str, Any]
     generated_at: str
 
+@coalesce
+async def _execute_query(sql_query: str) -> Tuple[List[str], List[tuple]]:
+    """
+    Run generated SQL on ClickHouse and return the column names and row tuples
+    
+    Results are reused for QUERY_RESULT_CACHE_TTL seconds unless the query looks at a
+    window of the last few minutes, whose rows change faster than that. Concurrent
+    requests for the same SQL share one ClickHouse round-trip.
+    """
+    cacheable = not SHORT_WINDOW_PATTERN.search(sql_query)
+    if cacheable:
+        cached = query_result_cache.get(sql_query)
+        if cached is not None:
+            return cached
+    
+    # clickhouse-connect is synchronous; keep the round-trip off the event loop
+    result = await asyncio.to_thread(client.query, sql_query)
+    logger.debug("Query returned %d rows", len(result.result_rows))
+    
+    # If no results, let's debug
+    if len(result.result_rows) == 0 and DEBUG_EMPTY_RESULTS:
+        logger.info("No results returned, checking table data")
+        try:
+            # One round-trip for all diagnostics
+            diagnostics = await asyncio.to_thread(client.query, EMPTY_RESULT_DIAGNOSTICS_QUERY)
+            total, min_date, max_date, countries, businesses, sample = diagnostics.result_rows[0]
+            logger.info("Total rows in trend_events: %s", total)
+            logger.info("Date range in trend_events: %s to %s", min_date, max_date)
+            logger.info("Available countries: %s", countries)
+            logger.info("Available businesses: %s", businesses)
+            logger.info("Sample data: %s", sample)
+            
+        except Exception as debug_e:
+            logger.warning("Debug query failed: %s", debug_e)
+    
+    data = (list(result.column_names), result.result_rows)
+    
+    if cacheable:
+        query_result_cache.set(sql_query, data)
+    return data
+
+
 @app.post(
     "/api/query", 
     response_model=QueryResponse,
@@ -209,170 +324,192 @@ class CampaignResponse(BaseModel):
     1. Converts your question to optimized ClickHouse SQL
     2. Executes the query safely
     3. Returns structured results with visualization hints
+    
+    With `?format=columnar`, `columns` lists the column names once and `data` holds
+    one value list per row instead of one object per row.
     """,
     response_description="Query results with SQL, data, and chart type suggestions"
 )
-async def process_query(request: QueryRequest):
+async def process_query(
+    request: QueryRequest,
+    result_format: Literal["rows", "columnar"] = Query("rows", alias="format")
+):
     try:
-        print(f"Processing query: {request.query}")
+        logger.debug("Processing query: %s", request.query)
         
         # Step 1: Convert to SQL
-        print("Converting natural language to SQL...")
         sql_query = await sql_agent.convert_to_sql(request.query)
-        print(f"Generated SQL: {sql_query}")
         
         # Step 2: Check ClickHouse connection
         if not client:
-            print("ERROR: ClickHouse client not available")
+            logger.error("ClickHouse client not available")
             raise HTTPException(status_code=500, detail="ClickHouse connection not available")
         
         # Step 3: Execute query
-        print("Executing query on ClickHouse...")
-        result = client.query(sql_query)
-        print(f"Query executed successfully, got {len(result.result_rows)} rows")
+        columns, rows = await _execute_query(sql_query)
+        if result_format == "columnar":
+            data = rows
+        else:
+            data = [dict(zip(columns, row)) for row in rows]
         
-        # If no results, let's debug
-        if len(result.result_rows) == 0:
-            print("No results returned. Let's check table data...")
-            try:
-                # Check if trend_events table exists and has data
-                count_result = client.query("SELECT COUNT(*) as total FROM trend_events")
-                print(f"Total rows in trend_events: {count_result.result_rows[0][0]}")
-                
-                # Check date range in trend_events
-                date_check = client.query("SELECT MIN(timestamp) as min_date, MAX(timestamp) as max_date FROM trend_events")
-                if date_check.result_rows:
-                    print(f"Date range in trend_events: {date_check.result_rows[0][0]} to {date_check.result_rows[0][1]}")
-                
-                # Check available countries
-                country_check = client.query("SELECT DISTINCT country_code FROM trend_events LIMIT 10")
-                if country_check.result_rows:
-                    print(f"Available countries: {[row[0] for row in country_check.result_rows]}")
-                
-                # Check available businesses
-                business_check = client.query("SELECT DISTINCT business FROM trend_events LIMIT 10")
-                if business_check.result_rows:
-                    print(f"Available businesses: {[row[0] for row in business_check.result_rows]}")
-                
-                # Show sample data (denormalized - no JOINs needed)
-                sample_result = client.query("SELECT topic_name, timestamp, stat_type, country_code, business FROM trend_events LIMIT 5")
-                print(f"Sample data: {sample_result.result_rows}")
-                
-            except Exception as debug_e:
-                print(f"Debug query failed: {debug_e}")
-        
-        # Step 4: Process results
-        data = []
-        if result.result_rows:
-            columns = result.column_names
-            print(f"Columns: {columns}")
-            for row in result.result_rows:
-                data.append(dict(zip(columns, row)))
-        
-        # Step 5: Determine visualization
+        # Step 4: Determine visualization
         chart_type = determine_chart_type(request.query, data)
-        title = generate_title(request.query)
-        print(f"Chart type: {chart_type}, Title: {title}")
+        title = f"Results: {request.query[:50]}" + ("..." if len(request.query) > 50 else "")
         
         return QueryResponse(
             sql=sql_query,
             data=data,
             chart_type=chart_type,
-            title=title
+            title=title,
+            columns=columns if result_format == "columnar" else None
         )
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERROR in process_query: {type(e).__name__}: {str(e)}")
-        import traceback
-        print(f"Full traceback: {traceback.format_exc()}")
+        logger.exception("process_query failed: %s: %s", type(e).__name__, e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {type(e).__name__}: {str(e)}")
 
+def _ndjson_blocks(stream) -> Iterator[bytes]:
+    """Encode a ClickHouse row block stream as NDJSON, one chunk per block"""
+    with stream:
+        columns = stream.source.column_names
+        for block in stream:
+            # default=str covers values orjson can't encode natively (Decimal, IPv4Address, ...);
+            # an encoding error here would truncate a response that has already started
+            yield b"".join(orjson.dumps(dict(zip(columns, row)), default=str) + b"\n" for row in block)
+
+@app.post(
+    "/api/query/stream",
+    tags=["Query & Analytics"],
+    summary="🔍 Stream Natural Language Query Results",
+    description="""
+    Same as `/api/query`, but streams the rows as newline-delimited JSON (one object per line)
+    while ClickHouse returns them, instead of buffering the whole result.
+    
+    Use it for queries returning tens of thousands of rows. Results are not cached.
+    """,
+    response_description="Query result rows as NDJSON"
+)
+async def stream_query(request: QueryRequest):
+    try:
+        logger.debug("Streaming query: %s", request.query)
+        
+        sql_query = await sql_agent.convert_to_sql(request.query)
+        
+        if not client:
+            logger.error("ClickHouse client not available")
+            raise HTTPException(status_code=500, detail="ClickHouse connection not available")
+        
+        # Starts the query, so SQL errors are still reported as a 500 before streaming begins
+        stream = await asyncio.to_thread(client.query_row_block_stream, sql_query)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.exception("stream_query failed: %s: %s", type(e).__name__, e)
+        raise HTTPException(status_code=500, detail=f"Internal server error: {type(e).__name__}: {str(e)}")
+    
+    # Starlette iterates synchronous generators in its threadpool, so reading blocks doesn't stall the loop.
+    # The background task also runs when the client disconnects before the first block, which would
+    # otherwise leave the query's pooled connection open (closing twice is a no-op).
+    # Content-Encoding: identity makes GZipMiddleware pass the stream through: it would otherwise
+    # buffer each block inside the compressor, so clients could not read rows as they arrive
+    return StreamingResponse(
+        _ndjson_blocks(stream),
+        media_type="application/x-ndjson",
+        headers={"Content-Encoding": "identity"},
+        background=BackgroundTask(stream.source.close)
+    )
+
 
 
 def determine_chart_type(query: str, data: List[Dict]) -> str:
     # Always return table for now - charts will be added later
     return "table"
 
-def generate_title(query: str) -> str:
-    return f"Results: {query[:50]}{'...' if len(query) > 50 else ''}"
+def _summarize_time_series(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Aggregate topic detail rows into summary stats in a single pass"""
+    trend_score_sum = 0.0
+    trend_score_count = 0
+    peak_trend_score = 0
+    total_volume = 0
+    # Dicts rather than sets, so the lists keep first-seen order and responses are stable
+    countries = {}
+    stat_types = {}
+    start = end = None
+    
+    for row in rows:
+        # Rows carry either raw events (trend_score, stat_value) or aggregates (avg_trend_score, total_volume)
+        trend_score = row.get('trend_score') or row.get('avg_trend_score')
+        if trend_score:
+            trend_score = float(trend_score)
+            trend_score_sum += trend_score
+            peak_trend_score = trend_score if not trend_score_count else max(peak_trend_score, trend_score)
+            trend_score_count += 1
+        
+        volume = row.get('stat_value') or row.get('total_volume')
+        if volume:
+            total_volume += float(volume)
+        
+        country_code = row.get('country_code')
+        if country_code:
+            countries[country_code] = None
+        stat_type = row.get('stat_type')
+        if stat_type:
+            stat_types[stat_type] = None
+        
+        timestamp = row.get('timestamp')
+        if timestamp:
+            if start is None or timestamp < start:
+                start = timestamp
+            if end is None or timestamp > end:
+                end = timestamp
+    
+    return {
+        'total_events': len(rows),
+        'avg_trend_score': trend_score_sum / trend_score_count if trend_score_count else 0,
+        'peak_trend_score': peak_trend_score,
+        'total_volume': total_volume,
+        'countries': list(countries),
+        'stat_types': list(stat_types),
+        'date_range': {
+            'start': start if start is not None else '',
+            'end': end if end is not None else ''
+        }
+    }
 
 @app.get("/api/topic/{topic_id}", response_model=TopicDetailResponse)
 async def get_topic_details(topic_id: int, time_range: str = "7d", stat_type: str = "all", country: str = "all"):
     try:
-        print(f"Fetching details for topic ID: {topic_id}")
+        logger.debug("Fetching details for topic ID: %s", topic_id)
         
         if not client:
             raise HTTPException(status_code=500, detail="ClickHouse connection not available")
         
-        # Build the natural language query for topic details using topic_id
-        query = f'Show me detailed information about topic ID {topic_id}'
-        
-        time_mapping = {
-            '1h': '1 HOUR',
-            '6h': '6 HOUR', 
-            '24h': '24 HOUR',
-            '7d': '7 DAY',
-            '30d': '30 DAY'
-        }
-        
-        time_interval = time_mapping.get(time_range, '7 DAY')
-        query += f' with time series data for the last {time_interval.lower()}'
-        
-        if stat_type != 'all':
-            query += f' for {stat_type} statistics'
-            
-        if country != 'all':
-            query += f' in {country}'
-        
-        print(f"Generated topic query: {query}")
-        
-        # Convert to SQL using agent
+        # Convert to SQL using agent (the natural language query is built by the topic detail prompt)
         sql_query = await sql_agent.generate_topic_detail_sql(topic_id, time_range, stat_type, country)
-        print(f"Generated SQL for topic: {sql_query}")
         
         # Execute the query
-        result = client.query(sql_query)
+        result = await asyncio.to_thread(client.query, sql_query)
         
         # Process the results
-        time_series_data = []
+        columns = result.column_names
+        time_series_data = [dict(zip(columns, row)) for row in result.result_rows]
         topic_info = {}
         
-        if result.result_rows:
-            columns = result.column_names
-            for row in result.result_rows:
-                row_data = dict(zip(columns, row))
-                time_series_data.append(row_data)
-                
-                # Extract topic info from first row
-                if not topic_info:
-                    topic_info = {
-                        'topic_name': row_data.get('topic_name', f'Topic {topic_id}'),
-                        'category': row_data.get('category'),
-                        'business': row_data.get('business'),
-                        'topic_id': row_data.get('topic_id', topic_id),
-                        'trend_score': row_data.get('avg_trend_score') or row_data.get('trend_score')
-                    }
-        
-        # Calculate stats
-        stats = {}
+        # Extract topic info from first row
         if time_series_data:
-            trend_scores = [float(row.get('trend_score', 0) or row.get('avg_trend_score', 0)) for row in time_series_data if row.get('trend_score') or row.get('avg_trend_score')]
-            stat_values = [float(row.get('stat_value', 0) or row.get('total_volume', 0)) for row in time_series_data if row.get('stat_value') or row.get('total_volume')]
-            
-            stats = {
-                'total_events': len(time_series_data),
-                'avg_trend_score': sum(trend_scores) / len(trend_scores) if trend_scores else 0,
-                'peak_trend_score': max(trend_scores) if trend_scores else 0,
-                'total_volume': sum(stat_values) if stat_values else 0,
-                'countries': list(set([row.get('country_code') for row in time_series_data if row.get('country_code')])),
-                'stat_types': list(set([row.get('stat_type') for row in time_series_data if row.get('stat_type')])),
-                'date_range': {
-                    'start': min([row.get('timestamp') for row in time_series_data if row.get('timestamp')], default=''),
-                    'end': max([row.get('timestamp') for row in time_series_data if row.get('timestamp')], default='')
-                }
+            first_row = time_series_data[0]
+            topic_info = {
+                'topic_name': first_row.get('topic_name', f'Topic {topic_id}'),
+                'category': first_row.get('category'),
+                'business': first_row.get('business'),
+                'topic_id': first_row.get('topic_id', topic_id),
+                'trend_score': first_row.get('avg_trend_score') or first_row.get('trend_score')
             }
         
+        # Calculate stats
+        stats = _summarize_time_series(time_series_data) if time_series_data else {}
+        
         # If no topic info was found, create a basic one
         if not topic_info:
             topic_info = {
@@ -392,9 +529,7 @@ async def get_topic_details(topic_id: int, time_range: str = "7d", stat_type: st
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERROR in get_topic_details: {type(e).__name__}: {str(e)}")
-        import traceback
-        print(f"Full traceback: {traceback.format_exc()}")
+        logger.exception("get_topic_details failed: %s: %s", type(e).__name__, e)
         raise HTTPException(status_code=500, detail=f"Internal server error: {type(e).__name__}: {str(e)}")
 
 @app.get(
@@ -425,7 +560,7 @@ async def get_topic_analysis(topic_id: int, time_range: str = "24h"):
     Get comprehensive trending analysis for a specific topic
     """
     try:
-        print(f"Getting trending analysis for topic ID: {topic_id}")
+        logger.debug("Getting trending analysis for topic ID: %s", topic_id)
         
         # Get comprehensive analysis from trending agent
         analysis = await trending_analysis_agent.analyze_topic_trending(topic_id, time_range)
@@ -438,9 +573,7 @@ async def get_topic_analysis(topic_id: int, time_range: str = "24h"):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERROR in get_topic_analysis: {type(e).__name__}: {str(e)}")
-        import traceback
-        print(f"Full traceback: {traceback.format_exc()}")
+        logger.exception("get_topic_analysis failed: %s: %s", type(e).__name__, e)
         raise HTTPException(status_code=500, detail=f"Analysis failed: {type(e).__name__}: {str(e)}")
 
 @app.get("/api/topic/{topic_id}/insights", response_model=TrendingInsightsResponse)
@@ -449,7 +582,7 @@ async def get_topic_insights(topic_id: int, time_range: str = "24h"):
     Get quick trending insights summary for a specific topic
     """
     try:
-        print(f"Getting trending insights for topic ID: {topic_id}")
+        logger.debug("Getting trending insights for topic ID: %s", topic_id)
         
         # Get quick insights summary
         insights = await trending_analysis_agent.get_trending_insights_summary(topic_id, time_range)
@@ -462,11 +595,18 @@ async def get_topic_insights(topic_id: int, time_range: str = "24h"):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERROR in get_topic_insights: {type(e).__name__}: {str(e)}")
-        import traceback
-        print(f"Full traceback: {traceback.format_exc()}")
+        logger.exception("get_topic_insights failed: %s: %s", type(e).__name__, e)
         raise HTTPException(status_code=500, detail=f"Insights failed: {type(e).__name__}: {str(e)}")
 
+def _to_campaign_request(request: CampaignGenerationRequest) -> CampaignRequest:
+    """Convert the API request models to the campaign generator's dataclass models"""
+    # The request models declare exactly the dataclasses' fields; dict() copies them shallowly
+    return CampaignRequest(**{
+        **dict(request),
+        'brand_profile': BrandProfile(**dict(request.brand_profile)),
+        'audience_profile': AudienceProfile(**dict(request.audience_profile))
+    })
+
 @app.post(
     "/api/campaigns/generate", 
     response_model=CampaignResponse,
@@ -508,42 +648,9 @@ async def generate_marketing_campaign(request: CampaignGenerationRequest):
     Generate a complete marketing campaign from a trending topic
     """
     try:
-        print(f"Generating marketing campaign for topic ID: {request.topic_id}")
-        
-        # Convert Pydantic models to dataclass models
-        brand_profile = BrandProfile(
-            brand_name=request.brand_profile.brand_name,
-            industry=request.brand_profile.industry,
-            business_vertical=request.brand_profile.business_vertical,
-            brand_voice=request.brand_profile.brand_voice,
-            target_markets=request.brand_profile.target_markets,
-            core_values=request.brand_profile.core_values,
-            prohibited_topics=request.brand_profile.prohibited_topics,
-            website_url=request.brand_profile.website_url,
-            logo_url=request.brand_profile.logo_url
-        )
-        
-        audience_profile = AudienceProfile(
-            demographics=request.audience_profile.demographics,
-            interests=request.audience_profile.interests,
-            pain_points=request.audience_profile.pain_points,
-            preferred_platforms=request.audience_profile.preferred_platforms,
-            content_preferences=request.audience_profile.content_preferences,
-            geographic_focus=request.audience_profile.geographic_focus,
-            age_range=request.audience_profile.age_range,
-            income_level=request.audience_profile.income_level
-        )
+        logger.info("Generating marketing campaign for topic ID: %s", request.topic_id)
         
-        campaign_request = CampaignRequest(
-            topic_id=request.topic_id,
-            brand_profile=brand_profile,
-            audience_profile=audience_profile,
-            campaign_goals=request.campaign_goals,
-            channels=request.channels,
-            budget=request.budget,
-            duration_days=request.duration_days,
-            urgent=request.urgent
-        )
+        campaign_request = _to_campaign_request(request)
         
         # Generate the complete campaign
         campaign = await campaign_generator.generate_complete_campaign(campaign_request)
@@ -556,11 +663,129 @@ async def generate_marketing_campaign(request: CampaignGenerationRequest):
     except HTTPException:
         raise
     except Exception as e:
-        print(f"ERROR in generate_marketing_campaign: {type(e).__name__}: {str(e)}")
-        import traceback
-        print(f"Full traceback: {traceback.format_exc()}")
+        logger.exception("generate_marketing_campaign failed: %s: %s", type(e).__name__, e)
         raise HTTPException(status_code=500, detail=f"Campaign generation failed: {type(e).__name__}: {str(e)}")
 
+@app.post(
+    "/api/campaigns/jobs",
+    response_model=CampaignJobResponse,
+    status_code=202,
+    tags=["Marketing Campaigns"],
+    summary="Queue a Marketing Campaign",
+    description="""
+    Queue campaign generation in the background and return immediately with a job ID.
+    
+    Takes the same body as `/api/campaigns/generate`. Poll `/api/campaigns/jobs/{job_id}`
+    until `status` is `completed` (the campaign is in `campaign`) or `failed`.
+    Finished jobs are kept for one hour after they complete.
+    
+    Jobs are held in the memory of the instance that accepted them. The service is
+    meant to run as a single instance with a single worker; behind several instances
+    or workers, a poll routed elsewhere returns 404.
+    """,
+    response_description="The queued campaign job"
+)
+async def queue_marketing_campaign(request: CampaignGenerationRequest):
+    """
+    Start generating a marketing campaign in the background
+    """
+    return CampaignJobResponse(**campaign_generator.submit_campaign(_to_campaign_request(request)))
+
+@app.get(
+    "/api/campaigns/jobs/{job_id}",
+    response_model=CampaignJobResponse,
+    tags=["Marketing Campaigns"],
+    summary="Get Campaign Job Status",
+    response_description="Job status, with the campaign once completed"
+)
+async def get_marketing_campaign_job(job_id: str):
+    """
+    Get the status (and, once completed, the result) of a queued campaign
+    """
+    job = campaign_generator.get_campaign_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Campaign job {job_id} not found")
+    return CampaignJobResponse(**job)
+
+# Static payload, serialized once; browsers and CDNs may keep it for a day
+CAMPAIGN_EXAMPLES_JSON = orjson.dumps({
+    "brand_examples": [
+        {
+            "name": "Tech Startup",
+            "profile": {
+                "brand_name": "AIFlow",
+                "industry": "SaaS",
+                "business_vertical": "tech",
+                "brand_voice": "authoritative",
+                "target_markets": ["B2B", "Enterprise"],
+                "core_values": ["Innovation", "Efficiency", "Trust"],
+                "prohibited_topics": ["Politics", "Religion"],
+                "website_url": "https://aiflow.com",
+                "logo_url": None
+            }
+        },
+        {
+            "name": "Fashion E-commerce",
+            "profile": {
+                "brand_name": "RetroVibes",
+                "industry": "Fashion",
+                "business_vertical": "retail",
+                "brand_voice": "trendy",
+                "target_markets": ["Gen Z", "Millennials"],
+                "core_values": ["Self-expression", "Sustainability", "Inclusivity"],
+                "prohibited_topics": ["Fast fashion criticism"],
+                "website_url": "https://retrovibes.com",
+                "logo_url": None
+            }
+        }
+    ],
+    "audience_examples": [
+        {
+            "name": "B2B Professionals",
+            "profile": {
+                "demographics": {"age_range": "25-45", "income": "75k-150k", "education": "Bachelor+"},
+                "interests": ["Productivity", "AI", "Business Growth", "Technology"],
+                "pain_points": ["Time management", "Tool fragmentation", "ROI measurement"],
+                "preferred_platforms": ["linkedin", "twitter", "email"],
+                "content_preferences": ["Educational", "Data-driven", "Case studies"],
+                "geographic_focus": ["US", "CA", "UK"],
+                "age_range": "25-45",
+                "income_level": "75k-150k"
+            }
+        },
+        {
+            "name": "Fashion-Forward Gen Z",
+            "profile": {
+                "demographics": {"age_range": "18-25", "income": "25k-50k", "education": "High School+"},
+                "interests": ["Fashion", "Sustainability", "Social causes", "Self-expression"],
+                "pain_points": ["Budget constraints", "Finding authentic brands", "Size inclusivity"],
+                "preferred_platforms": ["instagram", "tiktok", "email"],
+                "content_preferences": ["Visual", "Authentic", "Behind-the-scenes"],
+                "geographic_focus": ["US", "CA", "UK", "AU"],
+                "age_range": "18-25",
+                "income_level": "25k-50k"
+            }
+        }
+    ],
+    "campaign_goals": [
+        "brand_awareness",
+        "lead_generation", 
+        "engagement",
+        "sales",
+        "thought_leadership"
+    ],
+    "channels": [
+        "linkedin",
+        "twitter", 
+        "instagram",
+        "tiktok",
+        "facebook",
+        "email",
+        "blog"
+    ]
+})
+CAMPAIGN_EXAMPLES_HEADERS = {"Cache-Control": "public, max-age=86400"}
+
 @app.get(
     "/api/campaigns/examples",
     tags=["Marketing Campaigns"],
@@ -594,82 +819,7 @@ async def get_campaign_examples():
     """
     Get example brand profiles and audience profiles for testing
     """
-    return {
-        "brand_examples": [
-            {
-                "name": "Tech Startup",
-                "profile": {
-                    "brand_name": "AIFlow",
-                    "industry": "SaaS",
-                    "business_vertical": "tech",
-                    "brand_voice": "authoritative",
-                    "target_markets": ["B2B", "Enterprise"],
-                    "core_values": ["Innovation", "Efficiency", "Trust"],
-                    "prohibited_topics": ["Politics", "Religion"],
-                    "website_url": "https://aiflow.com",
-                    "logo_url": None
-                }
-            },
-            {
-                "name": "Fashion E-commerce",
-                "profile": {
-                    "brand_name": "RetroVibes",
-                    "industry": "Fashion",
-                    "business_vertical": "retail",
-                    "brand_voice": "trendy",
-                    "target_markets": ["Gen Z", "Millennials"],
-                    "core_values": ["Self-expression", "Sustainability", "Inclusivity"],
-                    "prohibited_topics": ["Fast fashion criticism"],
-                    "website_url": "https://retrovibes.com",
-                    "logo_url": None
-                }
-            }
-        ],
-        "audience_examples": [
-            {
-                "name": "B2B Professionals",
-                "profile": {
-                    "demographics": {"age_range": "25-45", "income": "75k-150k", "education": "Bachelor+"},
-                    "interests": ["Productivity", "AI", "Business Growth", "Technology"],
-                    "pain_points": ["Time management", "Tool fragmentation", "ROI measurement"],
-                    "preferred_platforms": ["linkedin", "twitter", "email"],
-                    "content_preferences": ["Educational", "Data-driven", "Case studies"],
-                    "geographic_focus": ["US", "CA", "UK"],
-                    "age_range": "25-45",
-                    "income_level": "75k-150k"
-                }
-            },
-            {
-                "name": "Fashion-Forward Gen Z",
-                "profile": {
-                    "demographics": {"age_range": "18-25", "income": "25k-50k", "education": "High School+"},
-                    "interests": ["Fashion", "Sustainability", "Social causes", "Self-expression"],
-                    "pain_points": ["Budget constraints", "Finding authentic brands", "Size inclusivity"],
-                    "preferred_platforms": ["instagram", "tiktok", "email"],
-                    "content_preferences": ["Visual", "Authentic", "Behind-the-scenes"],
-                    "geographic_focus": ["US", "CA", "UK", "AU"],
-                    "age_range": "18-25",
-                    "income_level": "25k-50k"
-                }
-            }
-        ],
-        "campaign_goals": [
-            "brand_awareness",
-            "lead_generation", 
-            "engagement",
-            "sales",
-            "thought_leadership"
-        ],
-        "channels": [
-            "linkedin",
-            "twitter", 
-            "instagram",
-            "tiktok",
-            "facebook",
-            "email",
-            "blog"
-        ]
-    }
+    return Response(CAMPAIGN_EXAMPLES_JSON, media_type="application/json", headers=CAMPAIGN_EXAMPLES_HEADERS)
 
 @app.get(
     "/api/health",
@@ -696,20 +846,31 @@ async def get_campaign_examples():
 async def health_check():
     clickhouse_status = "disconnected"
     if client:
-        try:
-            # Test the connection
-            result = client.query("SELECT 1")
-            clickhouse_status = "connected"
-        except Exception as e:
-            clickhouse_status = f"error: {str(e)}"
+        clickhouse_status = health_cache.get("clickhouse")
+        if clickhouse_status is None:
+            try:
+                # Test the connection (HTTP /ping, no query parsing)
+                ok = await asyncio.to_thread(client.ping)
+                clickhouse_status = "connected" if ok else "error: ping failed"
+            except Exception as e:
+                clickhouse_status = f"error: {str(e)}"
+            health_cache.set("clickhouse", clickhouse_status)
     
     return {
         "status": "healthy",
         "clickhouse_connected": client is not None,
         "clickhouse_status": clickhouse_status,
-        "openai_configured": openai_client.is_available()
+        "openai_configured": openai_client.is_available(),
+        "cache_stats": {
+            "generated_sql": sql_agent.sql_cache.stats(),
+            "query_results": query_result_cache.stats()
+        }
     }
 
 if __name__ == "__main__":
     import uvicorn
+    # Pass the app object: an import string would import this module a second time as "main",
+    # repeating the logging and client setup. The container runs the uvicorn CLI (see Dockerfile),
+    # which reads WEB_CONCURRENCY for its worker count; keep it at 1, since the caches and the
+    # campaign job store live in this process and are not shared between workers
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
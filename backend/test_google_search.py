@@ -3,10 +3,11 @@
 Test Google Custom Search API directly
 """
 import os
-import requests
 import asyncio
 from dotenv import load_dotenv
 
+from agents.integrations.http_client import get_http_client, close_http_client
+
 # Load environment variables
 load_dotenv()
 
@@ -33,7 +34,8 @@ async def test_google_search():
     
     try:
         print("Making Google Custom Search API request...")
-        response = requests.get(url, params=params, timeout=10)
+        # Same pooled async client the search providers use; doesn't block the event loop
+        response = await get_http_client().get(url, params=params)
         print(f"Status Code: {response.status_code}")
         
         if response.status_code == 200:
@@ -54,6 +56,8 @@ async def test_google_search():
             
     except Exception as e:
         print(f"ERROR: {str(e)}")
+    finally:
+        await close_http_client()
 
 if __name__ == "__main__":
     asyncio.run(test_google_search())
\ No newline at end of file
@@ -0,0 +1,65 @@
+"""
+TTLCache expiry and LRU eviction
+"""
+import unittest
+from unittest import mock
+
+from agents.core import cache
+from agents.core.cache import TTLCache
+
+
+class TTLCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch.object(cache.time, "monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_entry_expires_after_ttl(self):
+        entries = TTLCache(maxsize=4, ttl=10)
+        entries.set("key", "value")
+
+        self.now += 9
+        self.assertEqual(entries.get("key"), "value")
+        self.now += 1
+        self.assertIsNone(entries.get("key"))
+        self.assertEqual(len(entries), 0)
+
+    def test_per_entry_ttl(self):
+        entries = TTLCache(maxsize=4, ttl=10)
+        entries.set("short", 1, ttl=1)
+        entries.set("long", 2, ttl=100)
+
+        self.now += 50
+        self.assertNotIn("short", entries)
+        self.assertIn("long", entries)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        entries = TTLCache(maxsize=2, ttl=10)
+        entries.set("a", 1)
+        entries.set("b", 2)
+        entries.get("a")
+        entries.set("c", 3)
+
+        self.assertIn("a", entries)
+        self.assertNotIn("b", entries)
+        self.assertIn("c", entries)
+
+    def test_falsy_values_are_cached(self):
+        entries = TTLCache(maxsize=2, ttl=10)
+        entries.set("empty", [])
+
+        self.assertEqual(entries.get("empty", "missing"), [])
+
+    def test_stats(self):
+        entries = TTLCache(maxsize=2, ttl=10)
+        entries.set("a", 1)
+        entries.get("a")
+        entries.get("b")
+
+        self.assertEqual(entries.stats(), {"hits": 1, "misses": 1, "size": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+"""
+Channel content generation and background jobs of MarketingCampaignGenerator
+"""
+import asyncio
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+
+from agents.core import cache
+from agents.core.cache import TTLCache
+from agents.marketing.campaign_generator import MarketingCampaignGenerator
+from agents.marketing.models import AudienceProfile, BrandProfile, CampaignBrief, CampaignRequest, Platform
+
+
+def _brief(channels):
+    return CampaignBrief(
+        campaign_id="campaign",
+        topic_id=1,
+        topic_name="Topic",
+        brand_profile=BrandProfile("Brand", "tech", "saas", "professional", ["US"], ["trust"], []),
+        audience_profile=AudienceProfile({}, ["ai"], ["cost"], ["linkedin"], ["posts"], ["US"]),
+        campaign_goals=[],
+        channels=channels,
+        trending_analysis={},
+        campaign_concept={},
+        channel_strategy={},
+        content_pillars={},
+        success_metrics={},
+        created_at=datetime.now(timezone.utc)
+    )
+
+
+class CampaignContentTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.generator = MarketingCampaignGenerator()
+
+        async def blog(brief_data):
+            return [{"title": "Post"}]
+        self.generator._generate_blog_content = blog
+
+    def _fail_social(self):
+        async def social(brief_data, platform):
+            raise RuntimeError("OpenAI unavailable")
+        self.generator._generate_social_content = social
+
+    async def test_failed_channel_is_recorded(self):
+        self._fail_social()
+
+        content = await self.generator._generate_campaign_content(
+            _brief([Platform.LINKEDIN, Platform.BLOG]), datetime.now(timezone.utc)
+        )
+
+        self.assertEqual(content.blog_content, [{"title": "Post"}])
+        self.assertEqual(content.channel_errors, {"linkedin": "RuntimeError: OpenAI unavailable"})
+        self.assertIn("channel_errors", self.generator._serialize_campaign_content(content))
+
+    async def test_every_channel_failing_raises(self):
+        self._fail_social()
+
+        with self.assertRaises(Exception):
+            await self.generator._generate_campaign_content(
+                _brief([Platform.LINKEDIN, Platform.TWITTER]), datetime.now(timezone.utc)
+            )
+
+
+class CampaignJobTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.generator = MarketingCampaignGenerator()
+        self.release = asyncio.Event()
+
+        async def generate(campaign_request):
+            await self.release.wait()
+            return {"campaign_id": f"campaign-{campaign_request.topic_id}"}
+        self.generator.generate_complete_campaign = generate
+
+        self.now = 1000.0
+        patcher = mock.patch.object(cache.time, "monotonic", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _submit(self, topic_id=1):
+        brief = _brief([])
+        request = CampaignRequest(topic_id, brief.brand_profile, brief.audience_profile, [], ["blog"])
+        return self.generator.submit_campaign(request)["job_id"]
+
+    async def _finish(self):
+        self.release.set()
+        await asyncio.gather(*self.generator._job_tasks)
+
+    async def test_unfinished_jobs_are_not_evicted(self):
+        self.generator.campaign_jobs = TTLCache(maxsize=1, ttl=60)
+        job_ids = [self._submit(topic_id) for topic_id in range(3)]
+        await asyncio.sleep(0)
+
+        self.assertTrue(all(self.generator.get_campaign_job(job_id) for job_id in job_ids))
+
+        await self._finish()
+        self.assertEqual(self.generator.get_campaign_job(job_ids[-1])["status"], "completed")
+
+    async def test_expiry_starts_when_the_job_finishes(self):
+        job_id = self._submit()
+        await asyncio.sleep(0)
+
+        self.now += 2 * self.generator.campaign_jobs.ttl
+        self.assertEqual(self.generator.get_campaign_job(job_id)["status"], "running")
+
+        await self._finish()
+        self.now += self.generator.campaign_jobs.ttl - 1
+        self.assertEqual(self.generator.get_campaign_job(job_id)["status"], "completed")
+        self.now += 1
+        self.assertIsNone(self.generator.get_campaign_job(job_id))
+
+
+if __name__ == "__main__":
+    unittest.main()
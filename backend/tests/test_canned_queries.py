@@ -0,0 +1,49 @@
+"""
+Canned SQL for the trending page's queries
+"""
+import unittest
+
+from agents.sql.canned_queries import match_canned_query
+
+
+class CannedQueryTest(unittest.TestCase):
+
+    def test_time_window_only(self):
+        sql = match_canned_query("Show me trending topics in the last 24 hour")
+
+        self.assertIn(
+            "WHERE timestamp >= now() - INTERVAL 24 HOUR\nGROUP BY topic_id, topic_name, category, business\nORDER BY", sql
+        )
+        self.assertNotIn("country_code", sql)
+
+    def test_all_filters(self):
+        sql = match_canned_query(
+            "show me trending topics in the last 15 minutes in United Kingdom, in sports category, "
+            "for Technology business vertical"
+        )
+
+        self.assertIn("INTERVAL 15 MINUTE", sql)
+        self.assertIn("AND country_code = 'GB'", sql)
+        self.assertIn("AND category = 'sports'", sql)
+        self.assertIn("AND business = 'tech'", sql)
+
+    def test_country_filter_selects_country_code(self):
+        sql = match_canned_query("Show me trending topics in the last 24 hours in Canada")
+
+        self.assertIn("    business,\n    country_code,\n    avg(trend_score)", sql)
+        self.assertIn("GROUP BY topic_id, topic_name, category, business, country_code\n", sql)
+
+    def test_whitespace_is_normalized(self):
+        self.assertEqual(
+            match_canned_query("Show me  trending topics in the last 6 hours\n"),
+            match_canned_query("Show me trending topics in the last 6 hours")
+        )
+
+    def test_other_queries_are_not_matched(self):
+        self.assertIsNone(match_canned_query("Show me trending topics in the last 24 hours in Brazil"))
+        self.assertIsNone(match_canned_query("Which topics are trending in the last day?"))
+        self.assertIsNone(match_canned_query("Show me trending topics in the last 24 hours; DROP TABLE trend_events"))
+
+
+if __name__ == "__main__":
+    unittest.main()
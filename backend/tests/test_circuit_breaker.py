@@ -0,0 +1,98 @@
+"""
+CircuitBreaker states and the web search fan-out's use of them
+"""
+import asyncio
+import unittest
+from unittest import mock
+
+from agents.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from agents.integrations import web_search
+from agents.integrations.web_search import WebSearchClient
+
+
+async def _fail():
+    raise RuntimeError("provider down")
+
+
+async def _succeed():
+    return "ok"
+
+
+class CircuitBreakerTest(unittest.IsolatedAsyncioTestCase):
+
+    async def _open(self, breaker):
+        for _ in range(breaker.failure_threshold):
+            with self.assertRaises(RuntimeError):
+                await breaker.call(_fail)
+
+    async def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker("test", failure_threshold=2)
+        await self._open(breaker)
+
+        with self.assertRaises(CircuitOpenError):
+            await breaker.call(_succeed)
+
+    async def test_half_open_admits_one_probe(self):
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0)
+        await self._open(breaker)
+        release = asyncio.Event()
+
+        async def slow():
+            await release.wait()
+            return "ok"
+
+        probe = asyncio.create_task(breaker.call(slow))
+        await asyncio.sleep(0)
+
+        with self.assertRaises(CircuitOpenError):
+            await breaker.call(_succeed)
+
+        release.set()
+        self.assertEqual(await probe, "ok")
+        self.assertEqual(await breaker.call(_succeed), "ok")
+
+    async def test_failed_probe_reopens(self):
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0)
+        await self._open(breaker)
+        breaker.reset_timeout = 60
+
+        with self.assertRaises(RuntimeError):
+            await breaker.call(_fail)
+
+        with self.assertRaises(CircuitOpenError):
+            await breaker.call(_succeed)
+
+    async def test_cancelled_probe_frees_the_next_call(self):
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=0)
+        await self._open(breaker)
+
+        probe = asyncio.create_task(breaker.call(asyncio.sleep, 60))
+        await asyncio.sleep(0)
+        probe.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await probe
+
+        self.assertEqual(await breaker.call(_succeed), "ok")
+
+
+class SearchFanoutTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_hanging_provider_counts_as_failure(self):
+        client = WebSearchClient()
+
+        async def hang(self, query):
+            await asyncio.sleep(60)
+
+        # WebSearchClient uses __slots__, so the providers are replaced on the class
+        with mock.patch.object(WebSearchClient, "_search_with_google", hang), \
+                mock.patch.object(WebSearchClient, "_search_with_duckduckgo", hang), \
+                mock.patch.object(web_search, "SEARCH_FANOUT_TIMEOUT", 0.01):
+            result = await client._perform_web_search("topic news")
+
+        self.assertTrue(result.simulated)
+        self.assertEqual(client.google_breaker.failures, 1)
+        self.assertEqual(client.duckduckgo_breaker.failures, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
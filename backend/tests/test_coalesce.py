@@ -0,0 +1,100 @@
+"""
+Request coalescing with @coalesce
+"""
+import asyncio
+import unittest
+
+from agents.core.coalesce import coalesce
+
+
+class CoalesceTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    def _fetch(self, result=None, error=None, **coalesce_options):
+        @coalesce(**coalesce_options)
+        async def fetch(name, suffix=""):
+            self.calls += 1
+            await self.release.wait()
+            if error:
+                raise error
+            return result or name + suffix
+        return fetch
+
+    async def test_concurrent_calls_share_one_result(self):
+        fetch = self._fetch()
+
+        tasks = [asyncio.ensure_future(fetch("topic")) for _ in range(3)]
+        await asyncio.sleep(0)
+        self.release.set()
+
+        self.assertEqual(await asyncio.gather(*tasks), ["topic"] * 3)
+        self.assertEqual(self.calls, 1)
+
+    async def test_different_arguments_are_separate_calls(self):
+        fetch = self._fetch()
+        self.release.set()
+
+        self.assertEqual(await asyncio.gather(fetch("a"), fetch("b"), fetch("a", suffix="!")), ["a", "b", "a!"])
+        self.assertEqual(self.calls, 3)
+
+    async def test_key_function(self):
+        fetch = self._fetch(key=lambda name, suffix="": name.lower())
+
+        tasks = [asyncio.ensure_future(fetch("Topic")), asyncio.ensure_future(fetch("TOPIC"))]
+        await asyncio.sleep(0)
+        self.release.set()
+
+        self.assertEqual(await asyncio.gather(*tasks), ["Topic", "Topic"])
+        self.assertEqual(self.calls, 1)
+
+    async def test_finished_calls_are_not_reused(self):
+        fetch = self._fetch()
+        self.release.set()
+
+        await fetch("topic")
+        await fetch("topic")
+
+        self.assertEqual(self.calls, 2)
+
+    async def test_exception_reaches_every_caller(self):
+        fetch = self._fetch(error=RuntimeError("boom"))
+
+        tasks = [asyncio.ensure_future(fetch("topic")) for _ in range(2)]
+        await asyncio.sleep(0)
+        self.release.set()
+
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        self.assertTrue(all(isinstance(result, RuntimeError) for result in results))
+        self.assertEqual(self.calls, 1)
+
+    async def test_cancelled_caller_does_not_cancel_the_others(self):
+        fetch = self._fetch()
+
+        first = asyncio.ensure_future(fetch("topic"))
+        second = asyncio.ensure_future(fetch("topic"))
+        await asyncio.sleep(0)
+        first.cancel()
+        self.release.set()
+
+        with self.assertRaises(asyncio.CancelledError):
+            await first
+        self.assertEqual(await second, "topic")
+        self.assertEqual(self.calls, 1)
+
+    async def test_failed_call_is_retried(self):
+        fetch = self._fetch(error=RuntimeError("boom"))
+        self.release.set()
+
+        with self.assertRaises(RuntimeError):
+            await fetch("topic")
+        with self.assertRaises(RuntimeError):
+            await fetch("topic")
+
+        self.assertEqual(self.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Response caching of http_client.get_json
+"""
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import orjson
+
+from agents.integrations import http_client
+from agents.integrations.http_client import get_json
+from agents.integrations.real_web_search import GoogleSearchClient
+
+
+class _StubHttpClient:
+    """Answers every GET with the given JSON body and counts requests"""
+
+    def __init__(self, body):
+        self.body = body
+        self.calls = 0
+
+    async def get(self, url, params=None, headers=None):
+        self.calls += 1
+        return SimpleNamespace(content=orjson.dumps(self.body), raise_for_status=lambda: None)
+
+
+class GetJsonCacheTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        http_client._response_cache.clear()
+
+    def _serve(self, body):
+        self.http = _StubHttpClient(body)
+        patcher = mock.patch.object(http_client, "get_http_client", return_value=self.http)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_response_is_cached(self):
+        self._serve({"items": [1]})
+
+        await get_json("https://api.test/search", params={"q": "topic"})
+        await get_json("https://api.test/search", params={"q": "topic"})
+
+        self.assertEqual(self.http.calls, 1)
+
+    async def test_rejected_response_is_not_cached(self):
+        self._serve({"error": {"message": "quota exceeded"}})
+
+        await get_json("https://api.test/search", params={"q": "topic"}, cache_if=lambda data: data.get("items"))
+        await get_json("https://api.test/search", params={"q": "topic"}, cache_if=lambda data: data.get("items"))
+
+        self.assertEqual(self.http.calls, 2)
+
+    async def test_search_without_results_is_not_cached(self):
+        self._serve({"items": []})
+        client = GoogleSearchClient()
+        client.api_key, client.cse_id = "key", "cse"
+
+        result = await client.search("topic")
+
+        self.assertFalse(result["results_found"])
+        self.assertEqual(len(http_client._response_cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
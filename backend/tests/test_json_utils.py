@@ -0,0 +1,80 @@
+"""
+JSON parsing of LLM responses
+"""
+import unittest
+
+import orjson
+
+from agents.core.json_utils import JSONArrayStreamParser, parse_json_response
+
+
+class ParseJsonResponseTest(unittest.TestCase):
+
+    def test_plain_json(self):
+        self.assertEqual(parse_json_response('{"posts": []}'), {"posts": []})
+
+    def test_json_wrapped_in_prose(self):
+        text = 'Here you go:\n```json\n{"posts": [1]}\n```\nEnjoy {the campaign}'
+
+        self.assertEqual(parse_json_response(text, frozenset({"posts"})), {"posts": [1]})
+
+    def test_unexpected_shape_is_rejected(self):
+        with self.assertRaises(orjson.JSONDecodeError):
+            parse_json_response('{"emails": []}', frozenset({"posts"}))
+
+
+class JSONArrayStreamParserTest(unittest.TestCase):
+
+    RESPONSE = '{"campaign": "x", "posts": [{"hook": "a"}, {"hook": "b", "tags": ["c", "d"]}], "note": [0]}'
+
+    def _feed_all(self, parser, chunks):
+        items = []
+        for chunk in chunks:
+            items.extend(parser.feed(chunk))
+        return items
+
+    def test_whole_response(self):
+        parser = JSONArrayStreamParser("posts")
+
+        self.assertEqual(parser.feed(self.RESPONSE), [{"hook": "a"}, {"hook": "b", "tags": ["c", "d"]}])
+        self.assertEqual(parser.items_found, 2)
+
+    def test_split_into_single_characters(self):
+        parser = JSONArrayStreamParser("posts")
+
+        items = self._feed_all(parser, self.RESPONSE)
+
+        self.assertEqual(items, [{"hook": "a"}, {"hook": "b", "tags": ["c", "d"]}])
+        self.assertEqual(parser.text, self.RESPONSE)
+
+    def test_items_are_returned_as_soon_as_complete(self):
+        parser = JSONArrayStreamParser("posts")
+
+        self.assertEqual(parser.feed('{"posts": [{"hook": "a"}, {"ho'), [{"hook": "a"}])
+        self.assertEqual(parser.feed('ok": "b"}'), [{"hook": "b"}])
+        self.assertEqual(parser.feed(']}'), [])
+
+    def test_brackets_and_escapes_inside_strings(self):
+        response = r'{"posts": [{"body": "a ] } \" [ { b", "cta": "\\"}, {"body": "]"}]}'
+        parser = JSONArrayStreamParser("posts")
+
+        items = self._feed_all(parser, [response[i:i + 3] for i in range(0, len(response), 3)])
+
+        self.assertEqual(items, [{"body": 'a ] } " [ { b', "cta": "\\"}, {"body": "]"}])
+
+    def test_key_split_across_chunks(self):
+        parser = JSONArrayStreamParser("posts")
+
+        self.assertEqual(self._feed_all(parser, ['{"po', 'sts"', ': ', '[{"a": 1}]}']), [{"a": 1}])
+
+    def test_elements_after_the_array_are_ignored(self):
+        parser = JSONArrayStreamParser("posts")
+
+        parser.feed('{"posts": []')
+
+        self.assertEqual(parser.feed(', "more": [{"a": 1}]}'), [])
+        self.assertEqual(parser.items_found, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
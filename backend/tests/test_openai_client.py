@@ -0,0 +1,75 @@
+"""
+Response caching of OpenAIClient
+"""
+import unittest
+from types import SimpleNamespace
+
+from agents.integrations.openai_client import OpenAIClient, gather_stream
+
+
+def _response(content, finish_reason):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)])
+
+
+async def _stream(pieces, finish_reason):
+    for piece in pieces:
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece), finish_reason=None)])
+    yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=None), finish_reason=finish_reason)])
+
+
+class _StubCompletions:
+    """Answers every request with the given finish_reason and counts calls"""
+
+    def __init__(self, finish_reason):
+        self.finish_reason = finish_reason
+        self.calls = 0
+
+    async def create(self, stream=False, **kwargs):
+        self.calls += 1
+        if stream:
+            return _stream(["SELECT ", "1"], self.finish_reason)
+        return _response("SELECT 1", self.finish_reason)
+
+
+class ResponseCacheTest(unittest.IsolatedAsyncioTestCase):
+
+    def _client(self, finish_reason):
+        client = OpenAIClient()
+        self.completions = _StubCompletions(finish_reason)
+        client.client = SimpleNamespace(chat=SimpleNamespace(completions=self.completions))
+        return client
+
+    async def test_stopped_response_is_cached(self):
+        client = self._client("stop")
+
+        await client.generate_completion_with_system("system", "user")
+        await client.generate_completion_with_system("system", "user")
+
+        self.assertEqual(self.completions.calls, 1)
+
+    async def test_truncated_response_is_not_cached(self):
+        client = self._client("length")
+
+        await client.generate_completion_with_system("system", "user", max_tokens=400)
+        await client.generate_completion_with_system("system", "user", max_tokens=400)
+
+        self.assertEqual(self.completions.calls, 2)
+
+    async def test_streamed_response_is_cached_after_stop(self):
+        client = self._client("stop")
+
+        self.assertEqual(await gather_stream(client.stream_completion_with_system("system", "user")), "SELECT 1")
+        self.assertEqual(await client.generate_completion_with_system("system", "user"), "SELECT 1")
+
+        self.assertEqual(self.completions.calls, 1)
+
+    async def test_filtered_stream_is_not_cached(self):
+        client = self._client("content_filter")
+
+        await gather_stream(client.stream_completion_with_system("system", "user"))
+
+        self.assertEqual(len(client.response_cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+RateLimiter token refill and concurrency cap
+"""
+import asyncio
+import time
+import unittest
+
+from agents.core.rate_limit import RateLimiter
+
+
+class RateLimiterTest(unittest.IsolatedAsyncioTestCase):
+
+    async def test_burst_up_to_capacity_is_immediate(self):
+        limiter = RateLimiter(60, max_concurrent=10)
+
+        for _ in range(10):
+            async with limiter:
+                pass
+
+        self.assertAlmostEqual(limiter.tokens, 50, delta=0.1)
+
+    async def test_empty_bucket_waits_for_refill(self):
+        # 6000 per minute refills one token every 10ms
+        limiter = RateLimiter(6000, max_concurrent=1)
+        limiter.tokens = 0
+        limiter.updated_at = time.monotonic()
+
+        started = time.monotonic()
+        async with limiter:
+            pass
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.009)
+
+    async def test_refill_is_capped_at_capacity(self):
+        limiter = RateLimiter(60, max_concurrent=1)
+        limiter.tokens = 0
+        limiter.updated_at = time.monotonic() - 3600
+
+        async with limiter:
+            pass
+
+        self.assertAlmostEqual(limiter.tokens, 59, delta=0.1)
+
+    async def test_concurrency_is_capped(self):
+        limiter = RateLimiter(6000, max_concurrent=2)
+        active = peak = 0
+
+        async def request():
+            nonlocal active, peak
+            async with limiter:
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.01)
+                active -= 1
+
+        await asyncio.gather(*(request() for _ in range(6)))
+
+        self.assertEqual(peak, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
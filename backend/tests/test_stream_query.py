@@ -0,0 +1,115 @@
+"""
+NDJSON streaming of /api/query/stream
+"""
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+import orjson
+
+import main
+
+
+class _StubSource:
+    """Query context of a row block stream; closing it ends the stream"""
+
+    column_names = ("topic_name", "trend_score")
+
+    def __init__(self):
+        self.closed = threading.Event()
+
+    def close(self):
+        self.closed.set()
+
+
+class _StubBlockStream:
+    """Yields the given blocks, repeating them until closed if endless (a long-running query)"""
+
+    def __init__(self, blocks, endless=False):
+        self.source = _StubSource()
+        self.blocks = blocks
+        self.endless = endless
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.source.close()
+
+    def __iter__(self):
+        yield from self.blocks
+        while self.endless and not self.source.closed.wait(0.01):
+            yield from self.blocks
+
+
+class StreamQueryTest(unittest.IsolatedAsyncioTestCase):
+
+    def _serve(self, stream):
+        async def convert_to_sql(query):
+            return "SELECT topic_name, trend_score FROM trend_events"
+        client = mock.Mock()
+        client.query_row_block_stream.return_value = stream
+
+        for patcher in (mock.patch.object(main.sql_agent, "convert_to_sql", convert_to_sql),
+                        mock.patch.object(main, "client", client)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def _run(self, receive, accept_encoding=None):
+        response = await main.stream_query(main.QueryRequest(query="trending topics"))
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {"type": "http", "asgi": {"spec_version": "2.3"}, "headers": []}
+        if accept_encoding:
+            # minimum_size=1: without the opt-out even these few rows would be compressed
+            scope["headers"].append((b"accept-encoding", accept_encoding.encode()))
+            response = main.GZipMiddleware(response, minimum_size=1, compresslevel=1)
+        await response(scope, receive, send)
+        self.headers = dict(messages[0]["headers"])
+        return b"".join(message.get("body", b"") for message in messages)
+
+    async def test_rows_are_streamed_as_ndjson(self):
+        stream = _StubBlockStream([[("AI", 9.5)], [("F1", 7)]])
+        self._serve(stream)
+
+        async def receive():
+            await asyncio.Event().wait()
+
+        body = await self._run(receive)
+
+        self.assertEqual(
+            [orjson.loads(line) for line in body.splitlines()],
+            [{"topic_name": "AI", "trend_score": 9.5}, {"topic_name": "F1", "trend_score": 7}]
+        )
+        self.assertTrue(stream.source.closed.is_set())
+
+    async def test_stream_is_not_gzipped(self):
+        self._serve(_StubBlockStream([[("AI", 9.5)], [("F1", 7)]]))
+
+        async def receive():
+            await asyncio.Event().wait()
+
+        body = await self._run(receive, accept_encoding="gzip")
+
+        self.assertEqual(self.headers[b"content-encoding"], b"identity")
+        self.assertEqual(len(body.splitlines()), 2)
+
+    async def test_query_is_closed_when_client_disconnects(self):
+        stream = _StubBlockStream([[("AI", 9.5)]], endless=True)
+        self._serve(stream)
+
+        async def receive():
+            await asyncio.sleep(0.05)
+            return {"type": "http.disconnect"}
+
+        await self._run(receive)
+
+        self.assertTrue(stream.source.closed.is_set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Caching behaviour of TrendingAnalysisAgent
+"""
+import unittest
+
+from agents.analysis.trending_agent import TrendingAnalysisAgent
+
+
+def _analysis(**sections):
+    """Complete analysis with successful sections, overridden by the given ones"""
+    return {
+        "topic_info": {"topic_id": 1, "topic_name": "Topic"},
+        "trending_analysis": {"trending_reason": {}},
+        "popularity_distribution": {"category_analysis": {}},
+        "content_summary": {"topic_overview": {}},
+        "web_context": {"content_summary": "Summary", "key_themes": [], "degraded": False},
+        "raw_data": {},
+        **sections
+    }
+
+
+class AnalysisCacheTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.agent = TrendingAnalysisAgent(clickhouse=object())
+        self.calls = 0
+
+    def _stub_pipeline(self, analysis):
+        async def run(topic_id, time_range):
+            self.calls += 1
+            return analysis
+        self.agent._analyze_topic_trending = run
+
+    async def test_successful_analysis_is_cached(self):
+        self._stub_pipeline(_analysis())
+
+        await self.agent.analyze_topic_trending(1, "24h")
+        await self.agent.analyze_topic_trending(1, "24h")
+
+        self.assertEqual(self.calls, 1)
+
+    async def test_failed_sub_step_is_not_cached(self):
+        self._stub_pipeline(_analysis(popularity_distribution={"error": "TimeoutError: "}))
+
+        await self.agent.analyze_topic_trending(1, "24h")
+        await self.agent.analyze_topic_trending(1, "24h")
+
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(len(self.agent.analysis_cache), 0)
+
+    async def test_failed_web_search_is_not_cached(self):
+        self._stub_pipeline(_analysis(web_context={"error": "Web search failed: boom", "key_themes": []}))
+
+        await self.agent.analyze_topic_trending(1, "24h")
+
+        self.assertEqual(len(self.agent.analysis_cache), 0)
+
+    async def test_simulated_web_context_is_not_cached(self):
+        self._stub_pipeline(_analysis(web_context={"content_summary": "Summary", "degraded": True}))
+
+        await self.agent.analyze_topic_trending(1, "24h")
+
+        self.assertEqual(len(self.agent.analysis_cache), 0)
+
+
+class _StubWebSearch:
+    """Returns a fixed web context and counts searches"""
+
+    def __init__(self, web_context):
+        self.web_context = web_context
+        self.calls = 0
+
+    async def search_topic_context(self, topic_name, category, time_range="24h"):
+        self.calls += 1
+        return self.web_context
+
+
+class InsightsCacheTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.agent = TrendingAnalysisAgent(clickhouse=object())
+
+        async def trending_data(topic_id, time_range):
+            return {"topic_name": "Topic", "category": "tech", "avg_trend_score": 1.0, "top_regions": ["US"]}
+        self.agent._get_trending_data_cached = trending_data
+
+    async def test_summary_from_complete_search_is_cached(self):
+        self.agent.web_search = _StubWebSearch({"content_summary": "Summary", "key_themes": [], "degraded": False})
+
+        await self.agent.get_trending_insights_summary(1, "24h")
+        await self.agent.get_trending_insights_summary(1, "24h")
+
+        self.assertEqual(self.agent.web_search.calls, 1)
+
+    async def test_summary_from_degraded_search_is_not_cached(self):
+        self.agent.web_search = _StubWebSearch({"content_summary": "Summary", "key_themes": [], "degraded": True})
+
+        await self.agent.get_trending_insights_summary(1, "24h")
+        await self.agent.get_trending_insights_summary(1, "24h")
+
+        self.assertEqual(self.agent.web_search.calls, 2)
+        self.assertEqual(len(self.agent.insights_cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()